@@ -77,9 +77,9 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
         email=user.email,
         preferences={
             **user.preferences,
-            "password_hash": password_hash,
-            "role": "user"  # Default role
-        }
+            "password_hash": password_hash
+        },
+        role="user"  # Default role
     )
 
     db.add(db_user)
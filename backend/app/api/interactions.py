@@ -9,6 +9,7 @@ from ..schemas.interaction import InteractionCreate, InteractionResponse
 from ..models import Interaction, User, Item
 from ..utils.database import get_db
 from ..services.realtime import RealtimeUpdateService
+from ..services.collaborative_filtering import invalidate_collaborative_model
 
 router = APIRouter()
 
@@ -43,6 +44,9 @@ def create_interaction(interaction: InteractionCreate, db: Session = Depends(get
     db.commit()
     db.refresh(db_interaction)
 
+    # New interactions change the collaborative filtering matrices
+    invalidate_collaborative_model()
+
     # Track in real-time cache
     realtime_service = RealtimeUpdateService()
     realtime_service.track_interaction(
@@ -7,6 +7,7 @@ from typing import List, Optional
 from ..schemas.item import ItemCreate, ItemUpdate, ItemResponse
 from ..models import Item
 from ..utils.database import get_db
+from ..services.collaborative_filtering import invalidate_collaborative_model
 
 router = APIRouter()
 
@@ -91,6 +92,9 @@ def delete_item(item_id: int, db: Session = Depends(get_db)):
     db.delete(item)
     db.commit()
 
+    # Deleting an item also deletes its interactions
+    invalidate_collaborative_model()
+
     return None
 
 
@@ -32,7 +32,8 @@ def get_recommendations(
     Get personalized recommendations for a user
 
     Supports multiple algorithms:
-    - collaborative: Collaborative filtering (user-based + item-based)
+    - collaborative: Collaborative filtering (latent factors, falling back to
+      user-based + item-based)
     - content_based: Content-based filtering using item features
     - hybrid: Hybrid approach combining both methods
     """
@@ -7,6 +7,8 @@ from typing import List
 from ..schemas.user import UserCreate, UserUpdate, UserResponse
 from ..models import User
 from ..utils.database import get_db
+from ..utils.dependencies import invalidate_user_cache
+from ..services.collaborative_filtering import invalidate_collaborative_model
 
 router = APIRouter()
 
@@ -80,6 +82,8 @@ def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get
     db.commit()
     db.refresh(user)
 
+    invalidate_user_cache(user_id)
+
     return user
 
 
@@ -97,4 +101,7 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     db.delete(user)
     db.commit()
 
+    invalidate_user_cache(user_id)
+    invalidate_collaborative_model()
+
     return None
@@ -29,6 +29,7 @@ from .utils.database import init_db
 from .services.realtime import RealtimeUpdateService
 from .utils.logging import setup_logging, get_logger, configure_uvicorn_logging
 from .utils.metrics import setup_metrics
+from .utils.middleware import JWTDecodeMiddleware
 from .utils.rate_limit import limiter
 
 # Setup structured logging
@@ -148,6 +149,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Decode Bearer tokens once per request for the auth and rate limit dependencies
+app.add_middleware(JWTDecodeMiddleware)
+
 # Add rate limiting
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -14,6 +14,7 @@ class User(Base, TimestampMixin):
     username = Column(String(100), unique=True, index=True, nullable=False)
     email = Column(String(255), unique=True, index=True, nullable=False)
     preferences = Column(JSON, default=dict)  # User preferences and metadata
+    role = Column(String(50), default="user", server_default="user", nullable=False, index=True)
 
     # Relationships
     interactions = relationship("Interaction", back_populates="user", cascade="all, delete-orphan")
@@ -1,6 +1,6 @@
 """Business Rules Engine for filtering and boosting recommendations"""
 
-from typing import List, Tuple, Dict, Any, Callable
+from typing import List, Tuple, Dict, Any, Callable, Set
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from enum import Enum
@@ -47,6 +47,57 @@ class BusinessRule:
         """
         raise NotImplementedError
 
+    def _get_items(
+        self,
+        recommendations: List[Tuple[int, float]],
+        context: Dict[str, Any],
+        db: Session
+    ) -> Dict[int, Item]:
+        """
+        Get the recommended items by ID
+
+        Uses the items preloaded into the context by BusinessRulesEngine,
+        otherwise loads them in one query.
+        """
+        items = context.get("items")
+        if items is None:
+            items = _load_items(db, [item_id for item_id, _ in recommendations])
+        return items
+
+    def _get_purchased(
+        self,
+        recommendations: List[Tuple[int, float]],
+        user: User,
+        context: Dict[str, Any],
+        db: Session
+    ) -> Set[int]:
+        """
+        Get the IDs of recommended items the user has purchased
+
+        Uses the set preloaded into the context by BusinessRulesEngine,
+        otherwise loads it in one query.
+        """
+        purchased = context.get("purchased")
+        if purchased is None:
+            purchased = _load_purchased(db, user, [item_id for item_id, _ in recommendations])
+        return purchased
+
+
+def _load_items(db: Session, item_ids: List[int]) -> Dict[int, Item]:
+    """Load items by ID in a single query"""
+    return {item.id: item for item in db.query(Item).filter(Item.id.in_(item_ids))}
+
+
+def _load_purchased(db: Session, user: User, item_ids: List[int]) -> Set[int]:
+    """Load which of the given items the user has purchased, in a single query"""
+    return {
+        item_id for (item_id,) in db.query(Interaction.item_id).filter(
+            Interaction.user_id == user.id,
+            Interaction.interaction_type == "purchase",
+            Interaction.item_id.in_(item_ids)
+        )
+    }
+
 
 class FilterOutOfStockRule(BusinessRule):
     """Remove out-of-stock items from recommendations"""
@@ -63,16 +114,20 @@ class FilterOutOfStockRule(BusinessRule):
     ) -> List[Tuple[int, float]]:
         """Filter out items marked as out of stock"""
 
-        filtered = []
-        for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
-            if item:
-                # Check if item is in stock (in features or preferences)
-                in_stock = item.features.get("in_stock", True)
-                if in_stock:
-                    filtered.append((item_id, score))
-                else:
-                    logger.debug(f"Filtered out of stock item: {item_id}")
+        items = self._get_items(recommendations, context, db)
+        in_stock = {
+            item_id for item_id, item in items.items()
+            if (item.features or {}).get("in_stock", True)
+        }
+
+        filtered = [
+            (item_id, score) for item_id, score in recommendations
+            if item_id in in_stock
+        ]
+
+        filtered_count = len(recommendations) - len(filtered)
+        if filtered_count > 0:
+            logger.debug(f"Filtered {filtered_count} out of stock items")
 
         return filtered
 
@@ -92,13 +147,8 @@ class FilterAlreadyPurchasedRule(BusinessRule):
     ) -> List[Tuple[int, float]]:
         """Filter out already purchased items"""
 
-        # Get purchased items
-        purchased_items = set(
-            i.item_id for i in db.query(Interaction).filter(
-                Interaction.user_id == user.id,
-                Interaction.interaction_type == "purchase"
-            ).all()
-        )
+        # Get purchased items among the recommended ones
+        purchased_items = self._get_purchased(recommendations, user, context, db)
 
         filtered = [
             (item_id, score) for item_id, score in recommendations
@@ -132,9 +182,11 @@ class FilterAgeRestrictedRule(BusinessRule):
             # If age unknown, allow all (or implement stricter policy)
             return recommendations
 
+        items = self._get_items(recommendations, context, db)
+
         filtered = []
         for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
+            item = items.get(item_id)
             if item:
                 min_age = item.features.get("min_age", 0)
                 if user_age >= min_age:
@@ -164,9 +216,11 @@ class FilterGeoRestrictedRule(BusinessRule):
         if not user_country:
             return recommendations
 
+        items = self._get_items(recommendations, context, db)
+
         filtered = []
         for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
+            item = items.get(item_id)
             if item:
                 allowed_countries = item.features.get("allowed_countries", [])
                 blocked_countries = item.features.get("blocked_countries", [])
@@ -200,9 +254,11 @@ class BoostPromotionalItemsRule(BusinessRule):
     ) -> List[Tuple[int, float]]:
         """Boost promotional items"""
 
+        items = self._get_items(recommendations, context, db)
+
         boosted = []
         for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
+            item = items.get(item_id)
             if item:
                 is_promotional = item.features.get("is_promotional", False)
                 promo_end = item.features.get("promo_end_date")
@@ -242,9 +298,11 @@ class BoostNewItemsRule(BusinessRule):
 
         threshold_date = datetime.utcnow() - timedelta(days=self.days_threshold)
 
+        items = self._get_items(recommendations, context, db)
+
         boosted = []
         for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
+            item = items.get(item_id)
             if item and item.created_at >= threshold_date:
                 score *= self.boost_factor
                 logger.debug(f"Boosted new item {item_id}")
@@ -276,9 +334,11 @@ class BoostPersonalizedPreferencesRule(BusinessRule):
         if not favorite_categories and not favorite_tags:
             return recommendations
 
+        items = self._get_items(recommendations, context, db)
+
         boosted = []
         for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
+            item = items.get(item_id)
             if item:
                 boost = 1.0
 
@@ -315,12 +375,14 @@ class DiversityRule(BusinessRule):
     ) -> List[Tuple[int, float]]:
         """Ensure diversity by limiting items per category"""
 
+        items = self._get_items(recommendations, context, db)
+
         category_counts = {}
         diversified = []
         skipped = []
 
         for item_id, score in recommendations:
-            item = db.query(Item).filter(Item.id == item_id).first()
+            item = items.get(item_id)
             if item:
                 category = item.category or "uncategorized"
                 count = category_counts.get(category, 0)
@@ -389,6 +451,9 @@ class BusinessRulesEngine:
         """
         Apply all business rules to recommendations
 
+        The recommended items and the user's purchases among them are
+        loaded once and passed to every rule through the context.
+
         Args:
             recommendations: List of (item_id, score) tuples
             user: User object
@@ -398,7 +463,13 @@ class BusinessRulesEngine:
         Returns:
             Filtered and modified recommendations
         """
-        context = context or {}
+        # Preload everything the rules need in two queries, shared by all rules
+        item_ids = [item_id for item_id, _ in recommendations]
+        context = {
+            **(context or {}),
+            "items": _load_items(self.db, item_ids),
+            "purchased": _load_purchased(self.db, user, item_ids),
+        }
 
         logger.info(f"Applying business rules to {len(recommendations)} recommendations")
 
@@ -1,6 +1,11 @@
 """Collaborative Filtering Recommendation Algorithm"""
 
+import threading
+import time
+import weakref
 import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
 from typing import List, Dict, Tuple
 from sqlalchemy.orm import Session
 from sklearn.metrics.pairwise import cosine_similarity
@@ -10,6 +15,44 @@ from ..models import User, Item, Interaction
 from ..config import settings
 
 
+# Built matrices are shared by service instances of the same database engine.
+# They are dropped by invalidate_collaborative_model() after writes, and
+# expire after MODEL_CACHE_TTL seconds so other processes see writes too.
+MODEL_CACHE_TTL = 300
+
+# Rank of the latent factor model
+LATENT_FACTORS = 64
+
+_MODEL_ATTRS = (
+    "user_item_matrix",
+    "user_id_to_idx",
+    "item_id_to_idx",
+    "idx_to_user_id",
+    "idx_to_item_id",
+    "user_similarity_matrix",
+    "item_similarity_matrix",
+    "user_factors",
+    "item_factors",
+)
+
+_model_cache = weakref.WeakKeyDictionary()
+_model_cache_lock = threading.Lock()
+_model_version = 0
+
+
+def invalidate_collaborative_model() -> None:
+    """
+    Drop all cached collaborative filtering matrices
+
+    Call after writes that change interactions.
+    """
+    global _model_version
+
+    with _model_cache_lock:
+        _model_version += 1
+        _model_cache.clear()
+
+
 class CollaborativeFilteringService:
     """
     User-based and Item-based Collaborative Filtering
@@ -24,69 +67,243 @@ class CollaborativeFilteringService:
         self.user_item_matrix = None
         self.user_similarity_matrix = None
         self.item_similarity_matrix = None
+        self.user_factors = None
+        self.item_factors = None
+        self._version = None
+        self._load_shared_model()
 
-    def build_user_item_matrix(self) -> np.ndarray:
-        """Build user-item interaction matrix"""
-
-        # Get all interactions
-        interactions = self.db.query(Interaction).all()
-
-        # Get unique users and items
-        users = self.db.query(User).all()
-        items = self.db.query(Item).all()
+    def invalidate(self) -> None:
+        """Drop this instance's matrices and the shared cached model"""
+        self.user_item_matrix = None
+        self.user_similarity_matrix = None
+        self.item_similarity_matrix = None
+        self.user_factors = None
+        self.item_factors = None
+        invalidate_collaborative_model()
+
+    def _cache_key(self):
+        """Engine behind the session, so different databases never share a model"""
+        return self.db.get_bind().engine
+
+    def _load_shared_model(self) -> None:
+        """Adopt matrices already built by another instance, if still fresh"""
+        with _model_cache_lock:
+            entry = _model_cache.get(self._cache_key())
+            if (
+                entry is None
+                or entry["version"] != _model_version
+                or time.monotonic() - entry["built_at"] > MODEL_CACHE_TTL
+            ):
+                return
+
+            for attr, value in entry["state"].items():
+                setattr(self, attr, value)
+            self._version = entry["version"]
+
+    def _publish_shared_model(self) -> None:
+        """Share this instance's matrices, unless they were invalidated meanwhile"""
+        with _model_cache_lock:
+            if self._version != _model_version:
+                return
+
+            key = self._cache_key()
+            entry = _model_cache.get(key)
+            if entry is None or entry["state"].get("user_item_matrix") is not self.user_item_matrix:
+                entry = _model_cache[key] = {
+                    "version": self._version,
+                    "built_at": time.monotonic(),
+                    "state": {},
+                }
+
+            entry["state"].update(
+                (attr, getattr(self, attr)) for attr in _MODEL_ATTRS
+                if getattr(self, attr, None) is not None
+            )
+
+    def build_user_item_matrix(self) -> sparse.csr_matrix:
+        """
+        Build the sparse user-item interaction matrix
 
-        user_id_to_idx = {user.id: idx for idx, user in enumerate(users)}
-        item_id_to_idx = {item.id: idx for idx, item in enumerate(items)}
+        Rows are users and columns are items, both ordered by ID. Cells hold
+        the interaction rating, or its weight when there is no rating; when
+        a user has several interactions with an item the latest one wins.
 
-        # Initialize matrix
-        matrix = np.zeros((len(users), len(items)))
+        Returns:
+            CSR matrix of shape (n_users, n_items)
+        """
 
-        # Fill matrix with interaction weights or ratings
-        for interaction in interactions:
-            user_idx = user_id_to_idx.get(interaction.user_id)
-            item_idx = item_id_to_idx.get(interaction.item_id)
+        # Record the model version before reading, so a concurrent
+        # invalidation keeps this build from being shared
+        with _model_cache_lock:
+            self._version = _model_version
+        self.user_similarity_matrix = None
+        self.item_similarity_matrix = None
+        self.user_factors = None
+        self.item_factors = None
 
-            if user_idx is not None and item_idx is not None:
-                # Use rating if available, otherwise use weighted interaction
-                value = interaction.rating if interaction.rating else interaction.weight
-                matrix[user_idx, item_idx] = value
+        # Get unique users and items
+        user_ids = np.array(
+            [user_id for (user_id,) in self.db.query(User.id).order_by(User.id)], dtype=np.int64
+        )
+        item_ids = np.array(
+            [item_id for (item_id,) in self.db.query(Item.id).order_by(Item.id)], dtype=np.int64
+        )
+
+        # Get all interactions, using rating if available, otherwise weight
+        interactions = self.db.query(
+            Interaction.user_id, Interaction.item_id, Interaction.rating, Interaction.weight
+        ).order_by(Interaction.id).all()
+
+        count = len(interactions)
+        raw_users = np.fromiter((i.user_id for i in interactions), dtype=np.int64, count=count)
+        raw_items = np.fromiter((i.item_id for i in interactions), dtype=np.int64, count=count)
+        values = np.fromiter(
+            (i.rating if i.rating else i.weight for i in interactions), dtype=np.float64, count=count
+        )
+
+        # Map IDs to matrix indices, dropping interactions with unknown users/items
+        rows = _ids_to_indices(user_ids, raw_users)
+        cols = _ids_to_indices(item_ids, raw_items)
+        valid = (rows >= 0) & (cols >= 0)
+        rows, cols, values = rows[valid], cols[valid], values[valid]
+
+        # Keep only the latest interaction per cell (COO would sum duplicates)
+        cells = rows * item_ids.size + cols
+        _, last_from_end = np.unique(cells[::-1], return_index=True)
+        keep = cells.size - 1 - last_from_end
+
+        matrix = sparse.coo_matrix(
+            (values[keep], (rows[keep], cols[keep])), shape=(user_ids.size, item_ids.size)
+        ).tocsr()
+        matrix.eliminate_zeros()
 
         self.user_item_matrix = matrix
-        self.user_id_to_idx = user_id_to_idx
-        self.item_id_to_idx = item_id_to_idx
-        self.idx_to_user_id = {v: k for k, v in user_id_to_idx.items()}
-        self.idx_to_item_id = {v: k for k, v in item_id_to_idx.items()}
+        self.user_id_to_idx = {int(user_id): idx for idx, user_id in enumerate(user_ids)}
+        self.item_id_to_idx = {int(item_id): idx for idx, item_id in enumerate(item_ids)}
+        self.idx_to_user_id = {idx: user_id for user_id, idx in self.user_id_to_idx.items()}
+        self.idx_to_item_id = {idx: item_id for item_id, idx in self.item_id_to_idx.items()}
+
+        self._publish_shared_model()
 
         return matrix
 
-    def compute_user_similarity(self) -> np.ndarray:
-        """Compute user-user similarity matrix using cosine similarity"""
+    def compute_user_similarity(self) -> sparse.csr_matrix:
+        """
+        Compute user-user similarity matrix using cosine similarity
+
+        Computed directly on the sparse user-item matrix and kept sparse,
+        since most user pairs share no items.
+
+        Returns:
+            CSR matrix of shape (n_users, n_users)
+        """
 
         if self.user_item_matrix is None:
             self.build_user_item_matrix()
 
         # Cosine similarity between users
-        self.user_similarity_matrix = cosine_similarity(self.user_item_matrix)
+        similarity = cosine_similarity(self.user_item_matrix, dense_output=False).tocsr()
 
         # Set diagonal to 0 (a user is not similar to themselves for recommendation purposes)
-        np.fill_diagonal(self.user_similarity_matrix, 0)
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+
+        self.user_similarity_matrix = similarity
+        self._publish_shared_model()
 
         return self.user_similarity_matrix
 
-    def compute_item_similarity(self) -> np.ndarray:
-        """Compute item-item similarity matrix using cosine similarity"""
+    def compute_item_similarity(self) -> sparse.csr_matrix:
+        """
+        Compute item-item similarity matrix using cosine similarity
+
+        Returns:
+            CSR matrix of shape (n_items, n_items)
+        """
 
         if self.user_item_matrix is None:
             self.build_user_item_matrix()
 
         # Cosine similarity between items (transpose the matrix)
-        self.item_similarity_matrix = cosine_similarity(self.user_item_matrix.T)
+        similarity = cosine_similarity(self.user_item_matrix.T, dense_output=False).tocsr()
 
         # Set diagonal to 0
-        np.fill_diagonal(self.item_similarity_matrix, 0)
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+
+        self.item_similarity_matrix = similarity
+        self._publish_shared_model()
 
         return self.item_similarity_matrix
 
+    def compute_latent_factors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Factorize the user-item matrix with a truncated SVD
+
+        Singular values are folded into the user factors, so a user's
+        predicted scores are item_factors @ user_factors[user]. Factors are
+        stored as float32 to halve their memory.
+
+        Returns:
+            Tuple of (user_factors, item_factors) arrays
+        """
+
+        if self.user_item_matrix is None:
+            self.build_user_item_matrix()
+
+        n_users, n_items = self.user_item_matrix.shape
+        k = min(LATENT_FACTORS, min(n_users, n_items) - 1)
+
+        if k < 1 or self.user_item_matrix.nnz == 0:
+            self.user_factors = np.zeros((n_users, 0), dtype=np.float32)
+            self.item_factors = np.zeros((n_items, 0), dtype=np.float32)
+        else:
+            u, singular_values, vt = svds(self.user_item_matrix.astype(np.float64), k=k)
+            self.user_factors = (u * singular_values).astype(np.float32)
+            self.item_factors = np.ascontiguousarray(vt.T, dtype=np.float32)
+
+        self._publish_shared_model()
+
+        return self.user_factors, self.item_factors
+
+    def get_factor_recommendations(
+        self, user_id: int, top_n: int = 10, exclude_interacted: bool = True
+    ) -> List[Tuple[int, float]]:
+        """
+        Get recommendations from the latent factor model
+
+        Scoring is a single matrix-vector product over the item factors.
+
+        Args:
+            user_id: Target user ID
+            top_n: Number of recommendations to return
+            exclude_interacted: Whether to exclude items user has already interacted with
+
+        Returns:
+            List of tuples (item_id, score)
+        """
+
+        if self.item_factors is None:
+            self.compute_latent_factors()
+
+        # Get user index
+        user_idx = self.user_id_to_idx.get(user_id)
+        if user_idx is None or self.item_factors.shape[1] == 0:
+            return []
+
+        item_scores = self.item_factors @ self.user_factors[user_idx]
+
+        candidates = np.ones(item_scores.size, dtype=bool)
+
+        # Exclude already interacted items if requested
+        if exclude_interacted:
+            user_row = self.user_item_matrix[user_idx]
+            candidates[user_row.indices[user_row.data > 0]] = False
+
+        return _top_n_items(
+            np.flatnonzero(candidates), item_scores, top_n, self.idx_to_item_id
+        )
+
     def get_user_based_recommendations(
         self, user_id: int, top_n: int = 10, exclude_interacted: bool = True
     ) -> List[Tuple[int, float]]:
@@ -111,44 +328,42 @@ class CollaborativeFilteringService:
             return []
 
         # Get similar users
-        user_similarities = self.user_similarity_matrix[user_idx]
+        user_similarities = self.user_similarity_matrix[user_idx].toarray().ravel()
 
-        # Get top-k similar users
-        similar_user_indices = np.argsort(user_similarities)[-self.k_neighbors:][::-1]
+        # Get top-k similar users with positive similarity
+        k = min(self.k_neighbors, user_similarities.size)
+        if k == 0:
+            return []
+        neighbors = np.argpartition(-user_similarities, k - 1)[:k]
+        neighbors = neighbors[user_similarities[neighbors] > 0]
+        if neighbors.size == 0:
+            return []
+
+        weights = user_similarities[neighbors]
 
-        # Predict ratings for all items
-        item_scores = defaultdict(float)
-        similarity_sums = defaultdict(float)
+        # Only positive ratings contribute to predictions
+        ratings = self.user_item_matrix[neighbors]
+        ratings.data[ratings.data < 0] = 0
+        ratings.eliminate_zeros()
 
-        for similar_user_idx in similar_user_indices:
-            similarity = user_similarities[similar_user_idx]
-            if similarity <= 0:
-                continue
+        rated = ratings.copy()
+        rated.data[:] = 1.0
 
-            # Get items this similar user has interacted with
-            for item_idx, rating in enumerate(self.user_item_matrix[similar_user_idx]):
-                if rating > 0:
-                    item_id = self.idx_to_item_id[item_idx]
-                    item_scores[item_id] += similarity * rating
-                    similarity_sums[item_id] += similarity
+        # Similarity-weighted average rating per item, as one sparse product each
+        item_scores = ratings.T @ weights
+        similarity_sums = rated.T @ weights
 
-        # Normalize scores
-        for item_id in item_scores:
-            if similarity_sums[item_id] > 0:
-                item_scores[item_id] /= similarity_sums[item_id]
+        candidates = similarity_sums > 0
+        item_scores[candidates] /= similarity_sums[candidates]
 
         # Exclude already interacted items if requested
         if exclude_interacted:
-            interacted_items = set()
-            for item_idx, rating in enumerate(self.user_item_matrix[user_idx]):
-                if rating > 0:
-                    interacted_items.add(self.idx_to_item_id[item_idx])
+            user_row = self.user_item_matrix[user_idx]
+            candidates[user_row.indices[user_row.data > 0]] = False
 
-            item_scores = {k: v for k, v in item_scores.items() if k not in interacted_items}
-
-        # Sort by score and return top-n
-        sorted_items = sorted(item_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_items[:top_n]
+        return _top_n_items(
+            np.flatnonzero(candidates), item_scores, top_n, self.idx_to_item_id
+        )
 
     def get_item_based_recommendations(
         self, user_id: int, top_n: int = 10, exclude_interacted: bool = True
@@ -173,36 +388,28 @@ class CollaborativeFilteringService:
         if user_idx is None:
             return []
 
-        # Get items user has interacted with
-        user_ratings = self.user_item_matrix[user_idx]
-        interacted_item_indices = np.where(user_ratings > 0)[0]
+        # Get items user has interacted with (positive ratings only)
+        user_row = self.user_item_matrix[user_idx]
+        positive = user_row.data > 0
+        interacted_item_indices = user_row.indices[positive]
 
-        if len(interacted_item_indices) == 0:
+        if interacted_item_indices.size == 0:
             return []
 
-        # Calculate scores for all items
-        item_scores = defaultdict(float)
-
-        for item_idx in interacted_item_indices:
-            user_rating = user_ratings[item_idx]
-
-            # Get similar items
-            item_similarities = self.item_similarity_matrix[item_idx]
+        # Rating-weighted sum of positive similarities, as one sparse product
+        similarities = self.item_similarity_matrix[interacted_item_indices]
+        similarities.data[similarities.data < 0] = 0
+        item_scores = similarities.T @ user_row.data[positive]
 
-            # Add weighted similarities
-            for target_item_idx, similarity in enumerate(item_similarities):
-                if similarity > 0:
-                    target_item_id = self.idx_to_item_id[target_item_idx]
-                    item_scores[target_item_id] += similarity * user_rating
+        candidates = item_scores > 0
 
         # Exclude already interacted items if requested
         if exclude_interacted:
-            interacted_items = {self.idx_to_item_id[idx] for idx in interacted_item_indices}
-            item_scores = {k: v for k, v in item_scores.items() if k not in interacted_items}
+            candidates[interacted_item_indices] = False
 
-        # Sort by score and return top-n
-        sorted_items = sorted(item_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_items[:top_n]
+        return _top_n_items(
+            np.flatnonzero(candidates), item_scores, top_n, self.idx_to_item_id
+        )
 
     def get_recommendations(
         self, user_id: int, top_n: int = 10, method: str = "hybrid", exclude_interacted: bool = True
@@ -213,7 +420,9 @@ class CollaborativeFilteringService:
         Args:
             user_id: Target user ID
             top_n: Number of recommendations to return
-            method: 'user' for user-based, 'item' for item-based, 'hybrid' for both
+            method: 'user' for user-based, 'item' for item-based, 'factors' for the
+                latent factor model, 'hybrid' for the latent factor model with the
+                average of user- and item-based scores as fallback
             exclude_interacted: Whether to exclude items user has already interacted with
 
         Returns:
@@ -224,7 +433,16 @@ class CollaborativeFilteringService:
             return self.get_user_based_recommendations(user_id, top_n, exclude_interacted)
         elif method == "item":
             return self.get_item_based_recommendations(user_id, top_n, exclude_interacted)
+        elif method == "factors":
+            return self.get_factor_recommendations(user_id, top_n, exclude_interacted)
         else:  # hybrid
+            # Serve from the latent factor model; matrices too small to
+            # factorize fall back to the similarity-based methods
+            if self.item_factors is None:
+                self.compute_latent_factors()
+            if self.item_factors.shape[1] > 0:
+                return self.get_factor_recommendations(user_id, top_n, exclude_interacted)
+
             # Combine both methods
             user_recs = self.get_user_based_recommendations(user_id, top_n * 2, exclude_interacted)
             item_recs = self.get_item_based_recommendations(user_id, top_n * 2, exclude_interacted)
@@ -241,3 +459,53 @@ class CollaborativeFilteringService:
             sorted_items = sorted(final_scores.items(), key=lambda x: x[1], reverse=True)
 
             return sorted_items[:top_n]
+
+
+def _ids_to_indices(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """
+    Map IDs to their positions in a sorted ID array
+
+    Args:
+        sorted_ids: Sorted array of known IDs
+        ids: IDs to look up
+
+    Returns:
+        Array of positions, with -1 for IDs not in sorted_ids
+    """
+    if sorted_ids.size == 0:
+        return np.full(ids.size, -1, dtype=np.int64)
+
+    positions = np.searchsorted(sorted_ids, ids)
+    clipped = np.minimum(positions, sorted_ids.size - 1)
+
+    return np.where(sorted_ids[clipped] == ids, clipped, -1)
+
+
+def _top_n_items(
+    candidates: np.ndarray, scores: np.ndarray, top_n: int, idx_to_item_id: Dict[int, int]
+) -> List[Tuple[int, float]]:
+    """
+    Pick the top-n scoring candidates without sorting every item
+
+    Args:
+        candidates: Item indices eligible for recommendation
+        scores: Scores for all item indices
+        top_n: Number of items to return
+        idx_to_item_id: Mapping from item index to item ID
+
+    Returns:
+        List of tuples (item_id, score) sorted by score descending
+    """
+    candidate_scores = scores[candidates]
+
+    if top_n < candidates.size:
+        top = np.argpartition(-candidate_scores, top_n)[:top_n]
+    else:
+        top = np.arange(candidates.size)
+
+    top = top[np.argsort(-candidate_scores[top], kind="stable")]
+
+    return [
+        (idx_to_item_id[int(candidates[i])], float(candidate_scores[i]))
+        for i in top
+    ]
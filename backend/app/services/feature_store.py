@@ -2,11 +2,12 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from redis import Redis
-import json
+from redis import ConnectionPool, Redis
+import pickle
+import zstandard as zstd
 
 from ..models import User, Item, Interaction
 from ..config import settings
@@ -14,23 +15,43 @@ from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Separate Redis DB for the feature store
+FEATURE_STORE_DB = 4
+
+# Compression level for cached feature payloads
+CACHE_COMPRESSION_LEVEL = 3
+
+# Shared binary connection pool so instances reuse sockets
+_POOL = ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=FEATURE_STORE_DB,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=False,
+    max_connections=64
+)
+
 
 class FeatureStore:
     """
     Simple Feature Store for managing and serving features
 
     Provides consistent feature computation and caching for both
-    training and serving.
+    training and serving. Cached features live in Redis, so they are
+    shared by all workers and survive restarts.
     """
 
     def __init__(self, db: Session, redis_client: Optional[Redis] = None):
+        """
+        Initialize the feature store
+
+        Args:
+            db: Database session
+            redis_client: Redis client for the feature cache; it must not
+                decode responses, since payloads are compressed pickles
+        """
         self.db = db
-        self.redis = redis_client or Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=4,  # Separate DB for feature store
-            decode_responses=True
-        )
+        self.redis = redis_client or Redis(connection_pool=_POOL)
         self.feature_ttl = 3600  # 1 hour TTL for features
 
     # User Features
@@ -50,10 +71,10 @@ class FeatureStore:
 
         # Try cache first
         if use_cache:
-            cached = self.redis.get(cache_key)
-            if cached:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
                 logger.debug(f"User features cache hit for user {user_id}")
-                return json.loads(cached)
+                return cached
 
         logger.debug(f"Computing user features for user {user_id}")
 
@@ -62,27 +83,25 @@ class FeatureStore:
         if not user:
             return {}
 
-        # Get user interactions
-        interactions = self.db.query(Interaction).filter(
-            Interaction.user_id == user_id
-        ).all()
+        # Load the user's interactions and their item categories in one query
+        interaction_types, ratings, created_at, categories = self._load_user_interactions(user_id)
 
-        # Compute features
+        # Compute features over the loaded arrays
         features = {
             "user_id": user_id,
-            "total_interactions": len(interactions),
-            "interaction_types": self._count_interaction_types(interactions),
-            "avg_rating": self._compute_avg_rating(interactions),
-            "favorite_categories": self._compute_favorite_categories(user_id),
-            "activity_score": self._compute_activity_score(interactions),
-            "recency_score": self._compute_recency_score(interactions),
+            "total_interactions": int(interaction_types.size),
+            "interaction_types": _value_counts(interaction_types),
+            "avg_rating": _mean_rating(ratings),
+            "favorite_categories": _top_categories(categories),
+            "activity_score": _activity_score(created_at),
+            "recency_score": _recency_score(created_at),
             "account_age_days": (datetime.utcnow() - user.created_at).days,
             "preferences": user.preferences,
             "computed_at": datetime.utcnow().isoformat()
         }
 
         # Cache features
-        self.redis.setex(cache_key, self.feature_ttl, json.dumps(features))
+        self._cache_set(cache_key, self.feature_ttl, features)
 
         return features
 
@@ -121,10 +140,10 @@ class FeatureStore:
 
         # Try cache first
         if use_cache:
-            cached = self.redis.get(cache_key)
-            if cached:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
                 logger.debug(f"Item features cache hit for item {item_id}")
-                return json.loads(cached)
+                return cached
 
         logger.debug(f"Computing item features for item {item_id}")
 
@@ -156,7 +175,7 @@ class FeatureStore:
         }
 
         # Cache features
-        self.redis.setex(cache_key, self.feature_ttl, json.dumps(features))
+        self._cache_set(cache_key, self.feature_ttl, features)
 
         return features
 
@@ -198,9 +217,9 @@ class FeatureStore:
 
         # Try cache first
         if use_cache:
-            cached = self.redis.get(cache_key)
-            if cached:
-                return json.loads(cached)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
 
         # Get individual features
         user_features = self.get_user_features(user_id, use_cache)
@@ -229,19 +248,42 @@ class FeatureStore:
         }
 
         # Cache features (shorter TTL for contextual features)
-        self.redis.setex(cache_key, 300, json.dumps(features))  # 5 minutes
+        self._cache_set(cache_key, 300, features)  # 5 minutes
 
         return features
 
     # Helper methods
 
-    def _count_interaction_types(self, interactions: List[Interaction]) -> Dict[str, int]:
-        """Count interactions by type"""
-        counts = {}
-        for interaction in interactions:
-            interaction_type = interaction.interaction_type
-            counts[interaction_type] = counts.get(interaction_type, 0) + 1
-        return counts
+    def _load_user_interactions(self, user_id: int) -> Tuple[np.ndarray, ...]:
+        """
+        Load a user's interactions as column arrays
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Tuple of (interaction_types, ratings, created_at, categories)
+            arrays; missing ratings are NaN
+        """
+        rows = self.db.query(
+            Interaction.interaction_type,
+            Interaction.rating,
+            Interaction.created_at,
+            Item.category
+        ).outerjoin(
+            Item, Item.id == Interaction.item_id
+        ).filter(
+            Interaction.user_id == user_id
+        ).all()
+
+        interaction_types, ratings, created_at, categories = zip(*rows) if rows else ((),) * 4
+
+        return (
+            np.array(interaction_types, dtype=object),
+            np.array([np.nan if r is None else r for r in ratings], dtype=np.float64),
+            np.array(created_at, dtype="datetime64[us]"),
+            np.array(categories, dtype=object)
+        )
 
     def _count_interaction_type(self, interactions: List[Interaction], interaction_type: str) -> int:
         """Count specific interaction type"""
@@ -252,64 +294,29 @@ class FeatureStore:
         ratings = [i.rating for i in interactions if i.rating is not None]
         return np.mean(ratings) if ratings else 0.0
 
-    def _compute_favorite_categories(self, user_id: int, top_n: int = 3) -> List[str]:
-        """Compute user's favorite categories"""
-        # Get all items user interacted with
-        interactions = self.db.query(Interaction).filter(
-            Interaction.user_id == user_id
-        ).all()
-
-        # Count categories
-        category_counts = {}
-        for interaction in interactions:
-            item = self.db.query(Item).filter(Item.id == interaction.item_id).first()
-            if item and item.category:
-                category_counts[item.category] = category_counts.get(item.category, 0) + 1
-
-        # Sort and return top categories
-        sorted_categories = sorted(category_counts.items(), key=lambda x: x[1], reverse=True)
-        return [cat for cat, _ in sorted_categories[:top_n]]
-
-    def _compute_activity_score(self, interactions: List[Interaction]) -> float:
-        """
-        Compute user activity score
-
-        Higher score = more active user
-        """
-        if not interactions:
-            return 0.0
-
-        # Count recent interactions (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_interactions = [
-            i for i in interactions
-            if i.created_at >= thirty_days_ago
-        ]
-
-        # Score based on total and recent activity
-        total_score = min(len(interactions) / 100.0, 1.0)  # Cap at 100
-        recent_score = min(len(recent_interactions) / 30.0, 1.0)  # Cap at 30
-
-        return (total_score * 0.4 + recent_score * 0.6)
+    # Cache management
 
-    def _compute_recency_score(self, interactions: List[Interaction]) -> float:
+    def _cache_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """
-        Compute recency score
+        Get cached features, or None on a miss
 
-        Higher score = more recent activity
+        Entries that can't be decoded, such as JSON written by older
+        versions, count as misses and are recomputed.
         """
-        if not interactions:
-            return 0.0
+        value = self.redis.get(cache_key)
+        if value is None:
+            return None
 
-        # Get most recent interaction
-        most_recent = max(interactions, key=lambda x: x.created_at)
-        days_since = (datetime.utcnow() - most_recent.created_at).days
+        try:
+            return pickle.loads(zstd.decompress(value))
+        except Exception as e:
+            logger.debug(f"Ignoring undecodable feature cache entry {cache_key}: {e}")
+            return None
 
-        # Exponential decay: score decreases over time
-        # After 30 days, score is ~0.5, after 90 days ~0.2
-        return np.exp(-days_since / 30.0)
-
-    # Cache management
+    def _cache_set(self, cache_key: str, ttl: int, features: Dict[str, Any]) -> None:
+        """Cache features for ttl seconds"""
+        value = zstd.compress(pickle.dumps(features, protocol=5), CACHE_COMPRESSION_LEVEL)
+        self.redis.set(cache_key, value, ex=ttl)
 
     def invalidate_user_features(self, user_id: int) -> None:
         """Invalidate cached features for a user"""
@@ -330,3 +337,87 @@ class FeatureStore:
         if keys:
             self.redis.delete(*keys)
         logger.info(f"Invalidated {len(keys)} feature cache entries")
+
+
+def _value_counts(values: np.ndarray) -> Dict[str, int]:
+    """Count occurrences of each value"""
+    unique, counts = np.unique(values.astype(str), return_counts=True)
+    return {value: int(count) for value, count in zip(unique.tolist(), counts)}
+
+
+def _mean_rating(ratings: np.ndarray) -> float:
+    """Average of the non-missing ratings, 0.0 if there are none"""
+    rated = ratings[~np.isnan(ratings)]
+    return float(rated.mean()) if rated.size else 0.0
+
+
+def _top_categories(categories: np.ndarray, top_n: int = 3) -> List[str]:
+    """
+    Most frequent categories, most frequent first
+
+    Args:
+        categories: Category of each interacted item (None when unset)
+        top_n: Number of categories to return
+
+    Returns:
+        List of category names
+    """
+    # Number categories in order of first appearance and count the ids
+    category_ids = {}
+    ids = np.fromiter(
+        (category_ids.setdefault(c, len(category_ids)) for c in categories if c),
+        dtype=np.intp
+    )
+    if ids.size == 0:
+        return []
+
+    unique = list(category_ids)
+    counts = np.bincount(ids, minlength=len(unique))
+
+    if top_n < counts.size:
+        top = np.argpartition(-counts, top_n)[:top_n]
+    else:
+        top = np.arange(counts.size)
+
+    # Selected categories with equal counts keep first appearance order
+    top = top[np.argsort(-counts[top], kind="stable")]
+
+    return [unique[i] for i in top]
+
+
+def _activity_score(created_at: np.ndarray) -> float:
+    """
+    Activity score from interaction timestamps
+
+    Higher score = more active user
+    """
+    if created_at.size == 0:
+        return 0.0
+
+    # Count recent interactions (last 30 days)
+    thirty_days_ago = np.datetime64(datetime.utcnow() - timedelta(days=30), "us")
+    recent_count = int(np.count_nonzero(created_at >= thirty_days_ago))
+
+    # Score based on total and recent activity
+    total_score = min(created_at.size / 100.0, 1.0)  # Cap at 100
+    recent_score = min(recent_count / 30.0, 1.0)  # Cap at 30
+
+    return (total_score * 0.4 + recent_score * 0.6)
+
+
+def _recency_score(created_at: np.ndarray) -> float:
+    """
+    Recency score from interaction timestamps
+
+    Higher score = more recent activity
+    """
+    if created_at.size == 0:
+        return 0.0
+
+    # Whole days since the most recent interaction
+    now = np.datetime64(datetime.utcnow(), "us")
+    days_since = int((now - created_at.max()) // np.timedelta64(1, "D"))
+
+    # Exponential decay: score decreases over time
+    # After 30 days, score is ~0.5, after 90 days ~0.2
+    return float(np.exp(-days_since / 30.0))
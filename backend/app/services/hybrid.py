@@ -4,12 +4,41 @@ import numpy as np
 from typing import List, Tuple, Dict
 from sqlalchemy.orm import Session
 from collections import defaultdict
+from functools import lru_cache
 
 from .collaborative_filtering import CollaborativeFilteringService
 from .content_based import ContentBasedService
 from ..config import settings
 
 
+@lru_cache(maxsize=128)
+def _normalize_tuple(items: Tuple[Tuple[int, float], ...]) -> Tuple[float, ...]:
+    """
+    Min-max normalize the scores of (item_id, score) pairs
+
+    Memoized so repeated explanations for the same user reuse the result.
+    The cache is keyed by the scores themselves, so it never goes stale.
+
+    Args:
+        items: Tuple of (item_id, score) pairs
+
+    Returns:
+        Tuple of normalized scores in the same order as items
+    """
+
+    values = [score for _, score in items]
+    min_score = min(values)
+    max_score = max(values)
+
+    # Avoid division by zero
+    if max_score == min_score:
+        return (1.0,) * len(values)
+
+    # Min-max normalization
+    score_range = max_score - min_score
+    return tuple((v - min_score) / score_range for v in values)
+
+
 class HybridRecommendationService:
     """
     Hybrid recommendation combining collaborative filtering and content-based filtering
@@ -30,6 +59,7 @@ class HybridRecommendationService:
         """
         self.db = db
         self.alpha = alpha if alpha is not None else settings.HYBRID_ALPHA
+        self._one_minus_alpha = 1.0 - self.alpha
         self.collaborative_service = CollaborativeFilteringService(db)
         self.content_based_service = ContentBasedService(db)
 
@@ -81,26 +111,17 @@ class HybridRecommendationService:
             user_id, top_n * 3, exclude_interacted=exclude_interacted
         )
 
-        # Normalize scores to [0, 1] range
-        collab_scores = self._normalize_scores(dict(collaborative_recs))
-        content_scores = self._normalize_scores(dict(content_recs))
-
-        # Combine scores
-        all_items = set(collab_scores.keys()) | set(content_scores.keys())
-        hybrid_scores = {}
-
-        for item_id in all_items:
-            collab_score = collab_scores.get(item_id, 0)
-            content_score = content_scores.get(item_id, 0)
+        collab_ids, collab_scores = self._recs_to_arrays(collaborative_recs)
+        content_ids, content_scores = self._recs_to_arrays(content_recs)
 
-            # Weighted combination
-            hybrid_scores[item_id] = (
-                self.alpha * collab_score + (1 - self.alpha) * content_score
-            )
-
-        # Sort and return top-n
-        sorted_items = sorted(hybrid_scores.items(), key=lambda x: x[1], reverse=True)
-        return sorted_items[:top_n]
+        # Normalize scores to [0, 1] range and combine
+        return self._fuse_scores(
+            collab_ids,
+            self._normalize_scores_np(collab_scores),
+            content_ids,
+            self._normalize_scores_np(content_scores),
+            top_n
+        )
 
     def _rank_hybrid(
         self, user_id: int, top_n: int, exclude_interacted: bool
@@ -121,31 +142,16 @@ class HybridRecommendationService:
         )
 
         # Convert to rank-based scores (higher rank = better)
-        collab_ranks = {
-            item_id: len(collaborative_recs) - rank
-            for rank, (item_id, _) in enumerate(collaborative_recs)
-        }
-        content_ranks = {
-            item_id: len(content_recs) - rank
-            for rank, (item_id, _) in enumerate(content_recs)
-        }
-
-        # Combine ranks
-        all_items = set(collab_ranks.keys()) | set(content_ranks.keys())
-        hybrid_ranks = {}
-
-        for item_id in all_items:
-            collab_rank = collab_ranks.get(item_id, 0)
-            content_rank = content_ranks.get(item_id, 0)
-
-            # Weighted combination of ranks
-            hybrid_ranks[item_id] = (
-                self.alpha * collab_rank + (1 - self.alpha) * content_rank
-            )
-
-        # Sort and return top-n
-        sorted_items = sorted(hybrid_ranks.items(), key=lambda x: x[1], reverse=True)
-        return sorted_items[:top_n]
+        collab_ids, _ = self._recs_to_arrays(collaborative_recs)
+        content_ids, _ = self._recs_to_arrays(content_recs)
+
+        return self._fuse_scores(
+            collab_ids,
+            np.arange(collab_ids.size, 0, -1, dtype=np.float64),
+            content_ids,
+            np.arange(content_ids.size, 0, -1, dtype=np.float64),
+            top_n
+        )
 
     def _cascade_hybrid(
         self, user_id: int, top_n: int, exclude_interacted: bool
@@ -163,13 +169,15 @@ class HybridRecommendationService:
         )
 
         # If we have enough, return them
-        if len(collaborative_recs) >= top_n:
-            return collaborative_recs
+        needed = top_n - len(collaborative_recs)
+        if needed <= 0:
+            return collaborative_recs[:top_n]
 
-        # Otherwise, supplement with content-based
+        # Otherwise, supplement with content-based, requesting only the gap
+        # plus room for items that overlap with the collaborative results
         recommended_items = {item_id for item_id, _ in collaborative_recs}
         content_recs = self.content_based_service.get_recommendations(
-            user_id, top_n * 2, exclude_interacted=exclude_interacted
+            user_id, needed + len(recommended_items) + 5, exclude_interacted=exclude_interacted
         )
 
         # Add content-based recommendations that aren't already recommended
@@ -183,6 +191,74 @@ class HybridRecommendationService:
 
         return collaborative_recs[:top_n]
 
+    def _recs_to_arrays(
+        self, recs: List[Tuple[int, float]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Split (item_id, score) tuples into aligned ID and score arrays"""
+
+        item_ids = np.fromiter((item_id for item_id, _ in recs), dtype=np.int64, count=len(recs))
+        scores = np.fromiter((score for _, score in recs), dtype=np.float64, count=len(recs))
+
+        return item_ids, scores
+
+    def _fuse_scores(
+        self,
+        collab_ids: np.ndarray,
+        collab_scores: np.ndarray,
+        content_ids: np.ndarray,
+        content_scores: np.ndarray,
+        top_n: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Combine collaborative and content scores with the alpha weighting
+
+        Scores are scattered onto the sorted union of item IDs, so items
+        missing from one side contribute 0 for that side.
+
+        Returns:
+            List of tuples (item_id, score) for the top-n items
+        """
+
+        all_items = np.unique(np.concatenate([collab_ids, content_ids]))
+        if all_items.size == 0:
+            return []
+
+        collab = np.zeros(all_items.size)
+        collab[np.searchsorted(all_items, collab_ids)] = collab_scores
+
+        content = np.zeros(all_items.size)
+        content[np.searchsorted(all_items, content_ids)] = content_scores
+
+        # Weighted combination, accumulated in place
+        collab *= self.alpha
+        collab += self._one_minus_alpha * content
+
+        return self._select_top_n(all_items, collab, top_n)
+
+    def _select_top_n(
+        self, item_ids: np.ndarray, scores: np.ndarray, top_n: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Select the top-n items by score without sorting the full array
+
+        Args:
+            item_ids: Array of item IDs
+            scores: Array of scores aligned with item_ids
+            top_n: Number of items to return
+
+        Returns:
+            List of tuples (item_id, score) sorted by score descending
+        """
+
+        if top_n < scores.size:
+            top = np.argpartition(-scores, top_n)[:top_n]
+        else:
+            top = np.arange(scores.size)
+
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [(int(item_ids[i]), float(scores[i])) for i in top]
+
     def _normalize_scores(self, scores: Dict[int, float]) -> Dict[int, float]:
         """
         Normalize scores to [0, 1] range using min-max normalization
@@ -197,21 +273,39 @@ class HybridRecommendationService:
         if not scores:
             return {}
 
-        values = list(scores.values())
-        min_score = min(values)
-        max_score = max(values)
+        normalized = _normalize_tuple(tuple(scores.items()))
+
+        return dict(zip(scores.keys(), normalized))
+
+    def _normalize_scores_np(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Normalize a score array to [0, 1] range using min-max normalization
+
+        The array is normalized in place, so callers must pass an array
+        they own.
+
+        Args:
+            scores: Array of float scores
+
+        Returns:
+            The same array holding normalized scores
+        """
+
+        if scores.size == 0:
+            return scores
+
+        min_score = scores.min()
+        score_range = np.ptp(scores)
 
         # Avoid division by zero
-        if max_score == min_score:
-            return {k: 1.0 for k in scores.keys()}
+        if score_range == 0:
+            scores.fill(1.0)
+            return scores
 
-        # Min-max normalization
-        normalized = {
-            k: (v - min_score) / (max_score - min_score)
-            for k, v in scores.items()
-        }
+        np.subtract(scores, min_score, out=scores)
+        np.divide(scores, score_range, out=scores)
 
-        return normalized
+        return scores
 
     def explain_recommendation(
         self, user_id: int, item_id: int
@@ -247,17 +341,17 @@ class HybridRecommendationService:
         norm_collab_score = all_collab_scores.get(item_id, 0)
         norm_content_score = all_content_scores.get(item_id, 0)
 
-        final_score = (
-            self.alpha * norm_collab_score + (1 - self.alpha) * norm_content_score
-        )
+        collab_contribution = self.alpha * norm_collab_score
+        content_contribution = self._one_minus_alpha * norm_content_score
+        final_score = collab_contribution + content_contribution
 
         return {
             "collaborative_raw_score": collab_score,
             "content_raw_score": content_score,
             "collaborative_normalized_score": norm_collab_score,
             "content_normalized_score": norm_content_score,
-            "collaborative_contribution": self.alpha * norm_collab_score,
-            "content_contribution": (1 - self.alpha) * norm_content_score,
+            "collaborative_contribution": collab_contribution,
+            "content_contribution": content_contribution,
             "final_score": final_score,
             "alpha": self.alpha,
         }
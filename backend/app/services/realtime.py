@@ -1,13 +1,41 @@
 """Real-time Update Service using Redis"""
 
-import json
 import redis
+import msgpack
+import zstandard as zstd
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 
 from ..config import settings
 
 
+# Interaction history is kept for 30 days
+INTERACTION_TTL = 30 * 24 * 3600
+
+# Compression level for cached recommendation payloads
+CACHE_COMPRESSION_LEVEL = 3
+
+# Shared connection pools so service instances reuse sockets
+_POOL = redis.ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=True,
+    max_connections=64
+)
+
+# Binary pool for compressed cache payloads
+_BYTES_POOL = redis.ConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    db=settings.REDIS_DB,
+    password=settings.REDIS_PASSWORD,
+    decode_responses=False,
+    max_connections=64
+)
+
+
 class RealtimeUpdateService:
     """
     Real-time recommendation updates using Redis
@@ -17,13 +45,8 @@ class RealtimeUpdateService:
     """
 
     def __init__(self):
-        self.redis_client = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            decode_responses=True
-        )
+        self.redis_client = redis.Redis(connection_pool=_POOL)
+        self.cache_client = redis.Redis(connection_pool=_BYTES_POOL)
         self.cache_ttl = settings.CACHE_TTL
 
     def cache_recommendations(
@@ -48,14 +71,14 @@ class RealtimeUpdateService:
 
         try:
             key = self._get_cache_key(user_id, algorithm)
-            value = json.dumps({
+            value = msgpack.packb({
                 "recommendations": recommendations,
                 "cached_at": datetime.utcnow().isoformat(),
                 "algorithm": algorithm
             })
 
             ttl = ttl or self.cache_ttl
-            self.redis_client.setex(key, ttl, value)
+            self.cache_client.setex(key, ttl, zstd.compress(value, CACHE_COMPRESSION_LEVEL))
             return True
 
         except Exception as e:
@@ -78,10 +101,10 @@ class RealtimeUpdateService:
 
         try:
             key = self._get_cache_key(user_id, algorithm)
-            value = self.redis_client.get(key)
+            value = self.cache_client.get(key)
 
             if value:
-                data = json.loads(value)
+                data = msgpack.unpackb(zstd.decompress(value))
                 return data.get("recommendations")
 
             return None
@@ -136,25 +159,37 @@ class RealtimeUpdateService:
         """
 
         try:
-            # Store in sorted set with timestamp as score
+            # Index interaction IDs in a sorted set with timestamp as score,
+            # and keep the interaction fields in a hash per interaction
             key = f"interactions:user:{user_id}"
             timestamp = datetime.utcnow().timestamp()
+            interaction_id = self.redis_client.incr("interactions:seq")
+            interaction_key = f"interaction:{interaction_id}"
 
-            interaction_data = json.dumps({
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zadd(key, {interaction_id: timestamp})
+            pipe.hset(interaction_key, mapping={
                 "item_id": item_id,
                 "interaction_type": interaction_type,
                 "weight": weight,
                 "timestamp": timestamp
             })
 
-            # Add to sorted set
-            self.redis_client.zadd(key, {interaction_data: timestamp})
+            # Set expiry (30 days)
+            pipe.expire(key, INTERACTION_TTL)
+            pipe.expire(interaction_key, INTERACTION_TTL)
 
-            # Keep only last 1000 interactions per user
-            self.redis_client.zremrangebyrank(key, 0, -1001)
+            # IDs beyond the last 1000 interactions per user
+            pipe.zrange(key, 0, -1001)
+            evicted = pipe.execute()[-1]
 
-            # Set expiry (30 days)
-            self.redis_client.expire(key, 30 * 24 * 3600)
+            # Keep only last 1000 interactions per user, dropping the evicted
+            # interactions' hashes along with their index entries
+            if evicted:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.zrem(key, *evicted)
+                pipe.delete(*(f"interaction:{evicted_id}" for evicted_id in evicted))
+                pipe.execute()
 
             # Invalidate user's cached recommendations
             self.invalidate_user_cache(user_id)
@@ -182,10 +217,23 @@ class RealtimeUpdateService:
         try:
             key = f"interactions:user:{user_id}"
 
-            # Get most recent interactions
-            interactions = self.redis_client.zrevrange(key, 0, limit - 1)
+            # Get most recent interaction IDs, then fetch their fields
+            interaction_ids = self.redis_client.zrevrange(key, 0, limit - 1)
 
-            return [json.loads(interaction) for interaction in interactions]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for interaction_id in interaction_ids:
+                pipe.hgetall(f"interaction:{interaction_id}")
+
+            return [
+                {
+                    "item_id": int(fields["item_id"]),
+                    "interaction_type": fields["interaction_type"],
+                    "weight": float(fields["weight"]),
+                    "timestamp": float(fields["timestamp"])
+                }
+                for fields in pipe.execute()
+                if fields
+            ]
 
         except Exception as e:
             print(f"Error getting recent interactions: {e}")
@@ -205,7 +253,7 @@ class RealtimeUpdateService:
 
         try:
             key = "item:popularity"
-            self.redis_client.zincrby(key, increment, f"item:{item_id}")
+            self.redis_client.zincrby(key, increment, str(item_id))
             return True
 
         except Exception as e:
@@ -233,10 +281,9 @@ class RealtimeUpdateService:
                 key, '+inf', cutoff_time, start=0, num=limit
             )
 
-            # Extract item IDs
-            item_ids = [int(item.split(':')[1]) for item in trending if ':' in item]
-
-            return item_ids
+            # Members are bare item IDs; skip legacy "item:<id>" members
+            # until they age out of the 24 hour window
+            return [int(item) for item in trending if item.isdigit()]
 
         except Exception as e:
             print(f"Error getting trending items: {e}")
@@ -257,7 +304,7 @@ class RealtimeUpdateService:
             key = "item:trending"
             timestamp = datetime.utcnow().timestamp()
 
-            self.redis_client.zadd(key, {f"item:{item_id}": timestamp})
+            self.redis_client.zadd(key, {str(item_id): timestamp})
 
             # Clean up old entries (older than 24 hours)
             cutoff = (datetime.utcnow() - timedelta(hours=24)).timestamp()
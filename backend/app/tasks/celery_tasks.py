@@ -1,7 +1,8 @@
 """Background task definitions"""
 
 from .celery_config import celery_app
-from sqlalchemy import create_engine
+from celery import group
+from sqlalchemy import create_engine, select
 from sqlalchemy.orm import sessionmaker
 import os
 from datetime import datetime, timedelta
@@ -18,9 +19,17 @@ from ..utils.metrics import update_system_metrics
 logger = get_logger(__name__)
 
 # Database session for tasks
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_timeout=30
+)
 SessionLocal = sessionmaker(bind=engine)
 
+# Number of users handled by a single batch recommendation subtask
+BATCH_CHUNK_SIZE = 500
+
 
 @celery_app.task(name="app.tasks.celery_tasks.retrain_collaborative_model")
 def retrain_collaborative_model():
@@ -114,67 +123,105 @@ def update_item_features_task():
         db.close()
 
 
-@celery_app.task(name="app.tasks.celery_tasks.generate_batch_recommendations")
-def generate_batch_recommendations(top_n: int = 20):
+@celery_app.task(name="app.tasks.celery_tasks.generate_recs_for_chunk")
+def generate_recs_for_chunk(user_ids: list, top_n: int = 20):
     """
-    Generate recommendations for all users in batch
+    Generate recommendations for a chunk of users
 
     Args:
+        user_ids: IDs of the users in this chunk
         top_n: Number of recommendations per user
     """
-    logger.info(f"Starting batch recommendation generation for top {top_n} items")
     db = SessionLocal()
 
     try:
-        # Get all users
-        users = db.query(User).all()
-        logger.info(f"Generating recommendations for {len(users)} users")
-
         service = HybridRecommendationService(db)
-        total_recommendations = 0
+        rows = []
 
-        for user in users:
-            # Generate recommendations
+        for user_id in user_ids:
             recommendations = service.get_recommendations(
-                user.id,
+                user_id,
                 top_n=top_n,
                 exclude_interacted=True,
                 method="weighted"
             )
 
-            # Delete old hybrid recommendations for this user
-            db.query(Recommendation).filter(
-                Recommendation.user_id == user.id,
-                Recommendation.algorithm == "hybrid"
-            ).delete()
-
-            # Store new recommendations
-            for rank, (item_id, score) in enumerate(recommendations, 1):
-                rec = Recommendation(
-                    user_id=user.id,
-                    item_id=item_id,
-                    score=score,
-                    algorithm="hybrid",
-                    rank=rank
-                )
-                db.add(rec)
-                total_recommendations += 1
+            rows.extend(
+                {
+                    "user_id": user_id,
+                    "item_id": item_id,
+                    "score": score,
+                    "algorithm": "hybrid",
+                    "rank": rank
+                }
+                for rank, (item_id, score) in enumerate(recommendations, 1)
+            )
+
+        # Replace old hybrid recommendations for the whole chunk at once
+        db.query(Recommendation).filter(
+            Recommendation.user_id.in_(user_ids),
+            Recommendation.algorithm == "hybrid"
+        ).delete(synchronize_session=False)
+
+        if rows:
+            db.bulk_insert_mappings(Recommendation, rows)
 
         db.commit()
 
-        logger.info(f"Batch recommendation generation completed: {total_recommendations} recommendations")
+        return len(rows)
+
+    except Exception as e:
+        logger.error("Error generating recommendations for chunk", exc_info=True)
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task(name="app.tasks.celery_tasks.generate_batch_recommendations")
+def generate_batch_recommendations(top_n: int = 20):
+    """
+    Generate recommendations for all users in batch
+
+    Splits users into chunks and fans them out as a Celery group so
+    the work is spread across the worker pool.
+
+    Args:
+        top_n: Number of recommendations per user
+    """
+    logger.info(f"Starting batch recommendation generation for top {top_n} items")
+    db = SessionLocal()
+
+    try:
+        # Stream user IDs with a server-side cursor instead of loading User rows
+        user_ids = list(
+            db.execute(
+                select(User.id).execution_options(stream_results=True, yield_per=1000)
+            ).scalars()
+        )
+        logger.info(f"Generating recommendations for {len(user_ids)} users")
+
+        chunks = [
+            user_ids[i:i + BATCH_CHUNK_SIZE]
+            for i in range(0, len(user_ids), BATCH_CHUNK_SIZE)
+        ]
+
+        # Tasks must not block on subtask results, so dispatch and return
+        job = group(generate_recs_for_chunk.s(chunk, top_n) for chunk in chunks).apply_async()
+
+        logger.info(f"Dispatched {len(chunks)} recommendation chunks (group {job.id})")
 
         return {
-            "status": "success",
+            "status": "dispatched",
             "timestamp": datetime.utcnow().isoformat(),
-            "users_processed": len(users),
-            "recommendations_generated": total_recommendations,
-            "message": "Batch recommendations generated"
+            "users_processed": len(user_ids),
+            "chunks": len(chunks),
+            "group_id": job.id,
+            "message": "Batch recommendations dispatched"
         }
 
     except Exception as e:
         logger.error("Error generating batch recommendations", exc_info=True)
-        db.rollback()
         raise
     finally:
         db.close()
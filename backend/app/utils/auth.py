@@ -1,7 +1,12 @@
 """Authentication utilities - JWT token handling"""
 
+import hashlib
+import os
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional
+from cachetools import TTLCache
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -11,8 +16,13 @@ SECRET_KEY = "your-secret-key-change-in-production"  # Move to env vars in produ
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Tests lower this to 4
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Short-lived cache of decoded tokens, keyed by a hash of the token
+_decode_cache = TTLCache(maxsize=10_000, ttl=30)
+_decode_cache_lock = threading.Lock()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -92,6 +102,59 @@ def decode_token(token: str) -> dict:
         )
 
 
+def _token_cache_key(token: str) -> bytes:
+    """Hash a token for use as a cache key so raw tokens are never stored"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def get_cached_token_payload(token: str) -> Optional[dict]:
+    """
+    Look up a previously decoded token payload
+
+    Args:
+        token: JWT token
+
+    Returns:
+        Cached payload if present and not expired, otherwise None
+    """
+    with _decode_cache_lock:
+        payload = _decode_cache.get(_token_cache_key(token))
+
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
+    return None
+
+
+def decode_token_cached(token: str) -> dict:
+    """
+    Decode and validate a JWT token, reusing recent results
+
+    Repeat requests with the same token skip signature verification for
+    up to 30 seconds. Expired payloads are never served from the cache.
+
+    Args:
+        token: JWT token to decode
+
+    Returns:
+        Decoded token payload
+
+    Raises:
+        HTTPException: If token is invalid
+    """
+    payload = get_cached_token_payload(token)
+    if payload is not None:
+        return payload
+
+    payload = decode_token(token)
+
+    if payload.get("exp", 0) > time.time():
+        with _decode_cache_lock:
+            _decode_cache[_token_cache_key(token)] = payload
+
+    return payload
+
+
 def verify_token_type(payload: dict, expected_type: str) -> None:
     """
     Verify the token type
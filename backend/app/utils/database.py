@@ -1,6 +1,6 @@
 """Database connection and session management"""
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text, update
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
@@ -12,8 +12,12 @@ from ..models.base import Base
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=1800,  # Recycle connections every 30 minutes
+    pool_timeout=30,
+    echo=False,
+    future=True
 )
 
 # Create session factory
@@ -45,3 +49,25 @@ def init_db() -> None:
     from ..models import User, Item, Interaction, Recommendation, ABTest, ABTestAssignment
 
     Base.metadata.create_all(bind=engine)
+
+    _migrate_user_roles()
+
+
+def _migrate_user_roles() -> None:
+    """
+    Add the users.role column to databases created before it existed
+
+    Roles used to live in preferences["role"]; they are copied over once,
+    when the column is first added.
+    """
+    from ..models import User
+
+    columns = {column["name"] for column in inspect(engine).get_columns("users")}
+    if "role" in columns:
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE users ADD COLUMN role VARCHAR(50) NOT NULL DEFAULT 'user'"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_users_role ON users (role)"))
+        role = User.preferences["role"].as_string()
+        conn.execute(update(User).where(role.isnot(None)).values(role=role))
@@ -1,26 +1,77 @@
 """Authentication dependencies for FastAPI"""
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from typing import Optional
+from cachetools import TTLCache
+import threading
 
 from .database import get_db
-from .auth import decode_token, verify_token_type
+from .auth import decode_token_cached, get_cached_token_payload, verify_token_type
 from ..models import User
 
-security = HTTPBearer()
+# Short-lived cache of detached User objects, keyed by user ID
+_user_cache = TTLCache(maxsize=5000, ttl=60)
+_user_cache_lock = threading.Lock()
+
+# Declares the bearer scheme in the OpenAPI schema; missing or malformed
+# credentials are answered with a 401 by get_current_user itself
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def invalidate_user_cache(user_id: int) -> None:
+    """
+    Drop a user from the authentication user cache
+
+    Call after a user's profile, role or credentials change.
+
+    Args:
+        user_id: User ID
+    """
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def _get_user(db: Session, user_id: int) -> Optional[User]:
+    """
+    Resolve a user by ID, using the user cache when possible
+
+    The cache holds detached copies; hits are merged into the request
+    session without emitting a SELECT.
+    """
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+
+    if cached is not None:
+        return db.merge(cached, load=False)
+
+    user = db.get(User, user_id)
+    if user is None:
+        return None
+
+    # Cache a detached copy so later commits in this session can't expire it
+    db.expunge(user)
+    with _user_cache_lock:
+        _user_cache[user_id] = user
+
+    return db.merge(user, load=False)
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Security(bearer_scheme),
     db: Session = Depends(get_db)
 ) -> User:
     """
     Get the current authenticated user from JWT token
 
+    Uses the payload already decoded by JWTDecodeMiddleware when present.
+
     Args:
-        credentials: HTTP Bearer token
+        request: Incoming request
+        credentials: Bearer credentials from the Authorization header
         db: Database session
 
     Returns:
@@ -29,8 +80,22 @@ async def get_current_user(
     Raises:
         HTTPException: If authentication fails
     """
-    token = credentials.credentials
-    payload = decode_token(token)
+    token = credentials.credentials if credentials is not None else ""
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    payload = getattr(request.state, "jwt_payload", None)
+
+    if payload is None:
+        # Cache hits stay on the event loop; only misses pay for a thread hop
+        payload = get_cached_token_payload(token)
+        if payload is None:
+            payload = await run_in_threadpool(decode_token_cached, token)
+
     verify_token_type(payload, "access")
 
     user_id: Optional[int] = payload.get("sub")
@@ -41,7 +106,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _get_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -81,8 +146,7 @@ def require_role(required_role: str):
         @router.get("/admin", dependencies=[Depends(require_role("admin"))])
     """
     async def role_checker(current_user: User = Depends(get_current_user)):
-        # Add role field to User model if needed
-        user_role = current_user.preferences.get("role", "user")
+        user_role = current_user.role
 
         if user_role != required_role and user_role != "admin":
             raise HTTPException(
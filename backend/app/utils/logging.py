@@ -1,12 +1,37 @@
 """Structured logging configuration"""
 
+import functools
 import logging
+import os
 import sys
 from typing import Any
+import orjson
 import structlog
 from pythonjsonlogger import jsonlogger
 
 
+def _orjson_dumps(obj: Any, default: Any = None, **kwargs: Any) -> str:
+    """
+    Serialize to a JSON string with orjson
+
+    Accepts and ignores the stdlib json.dumps keyword arguments that
+    structlog and python-json-logger pass along. Non-string dict keys
+    are stringified, as the stdlib encoder does.
+    """
+    return orjson.dumps(obj, default=default or str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Processor chain shared by every structlog logger. StackInfoRenderer is
+# left out by default and only added when STRUCTLOG_STACKINFO=1
+_PROCESSORS = (
+    structlog.contextvars.merge_contextvars,
+    structlog.processors.add_log_level,
+    structlog.dev.set_exc_info,
+    structlog.processors.TimeStamper(fmt="iso"),
+    structlog.processors.JSONRenderer(serializer=_orjson_dumps),
+)
+
+
 def setup_logging(log_level: str = "INFO") -> None:
     """
     Configure structured logging with JSON output
@@ -14,36 +39,36 @@ def setup_logging(log_level: str = "INFO") -> None:
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     """
+    level = getattr(logging, log_level.upper())
+
     # Configure standard logging
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
-        level=getattr(logging, log_level.upper())
+        level=level
     )
 
+    processors = list(_PROCESSORS)
+    if os.getenv("STRUCTLOG_STACKINFO") == "1":
+        processors.insert(2, structlog.processors.StackInfoRenderer())
+
     # Configure structlog
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.dev.set_exc_info,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.JSONRenderer()
-        ],
-        wrapper_class=structlog.make_filtering_bound_logger(
-            getattr(logging, log_level.upper())
-        ),
+        processors=processors,
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         context_class=dict,
         logger_factory=structlog.PrintLoggerFactory(),
-        cache_logger_on_first_use=False
+        cache_logger_on_first_use=True
     )
 
 
+@functools.lru_cache(maxsize=256)
 def get_logger(name: str) -> structlog.BoundLogger:
     """
     Get a structured logger instance
 
+    Loggers are memoized per name.
+
     Args:
         name: Logger name (typically __name__)
 
@@ -57,6 +82,10 @@ def get_logger(name: str) -> structlog.BoundLogger:
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
     """Custom JSON formatter with additional fields"""
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("json_serializer", _orjson_dumps)
+        super(CustomJsonFormatter, self).__init__(*args, **kwargs)
+
     def add_fields(self, log_record: dict, record: logging.LogRecord, message_dict: dict) -> None:
         super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
 
@@ -2,10 +2,29 @@
 
 from prometheus_client import Counter, Histogram, Gauge, Info
 from prometheus_fastapi_instrumentator import Instrumentator
-from typing import Callable
+from cachetools import TTLCache
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from typing import Callable, Tuple
+import os
 import time
 from functools import wraps
 
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+# Timing decorators and record helpers become no-ops when metrics are
+# switched off (dev/test)
+METRICS_ENABLED = os.getenv("ENABLE_METRICS", "true").lower() in ("true", "1")
+
+# The in-progress gauge adds work to every request; set METRICS_INPROGRESS=0
+# where nothing scrapes it
+METRICS_INPROGRESS = os.getenv("METRICS_INPROGRESS", "1") == "1"
+
+# Scrape and health probe paths are not instrumented
+EXCLUDED_HANDLERS = [r"^/(metrics|health|healthz|livez|readyz)$"]
+
 # Application info
 app_info = Info('recommendation_engine', 'Recommendation Engine Information')
 app_info.info({
@@ -26,11 +45,11 @@ http_request_duration_seconds = Histogram(
     ['method', 'endpoint']
 )
 
-# Recommendation metrics
+# Recommendation metrics (labelled by algorithm only to keep cardinality bounded)
 recommendations_generated_total = Counter(
     'recommendations_generated_total',
     'Total recommendations generated',
-    ['algorithm', 'user_id']
+    ['algorithm']
 )
 
 recommendation_generation_duration_seconds = Histogram(
@@ -100,6 +119,41 @@ db_connection_pool_available = Gauge(
 )
 
 
+# Pre-bound label children for the hot paths
+CACHE_HIT_REDIS = cache_hits_total.labels(cache_type="redis")
+CACHE_MISS_REDIS = cache_misses_total.labels(cache_type="redis")
+
+_cache_hit_children = {("redis",): CACHE_HIT_REDIS}
+_cache_miss_children = {("redis",): CACHE_MISS_REDIS}
+_recommendation_children = {}
+_interaction_children = {}
+_ab_assignment_children = {}
+
+
+# Table counts only need to be roughly current, so they are reused for 30 seconds
+_sys_metric_cache = TTLCache(maxsize=1, ttl=30)
+
+_ESTIMATED_COUNT_SQL = text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t")
+
+
+def _labelled(metric, children: dict, *label_values: str):
+    """
+    Get the child of a labelled metric, resolving it at most once
+
+    Args:
+        metric: Labelled Prometheus metric
+        children: Dict caching resolved children for this metric
+        label_values: Label values in the metric's label order
+
+    Returns:
+        The metric child for these label values
+    """
+    child = children.get(label_values)
+    if child is None:
+        child = children[label_values] = metric.labels(*label_values)
+    return child
+
+
 def setup_metrics(app):
     """
     Setup Prometheus metrics for FastAPI app
@@ -112,8 +166,8 @@ def setup_metrics(app):
         should_group_status_codes=False,
         should_ignore_untemplated=True,
         should_respect_env_var=True,
-        should_instrument_requests_inprogress=True,
-        excluded_handlers=["/metrics"],
+        should_instrument_requests_inprogress=METRICS_INPROGRESS,
+        excluded_handlers=EXCLUDED_HANDLERS,
         env_var_name="ENABLE_METRICS",
         inprogress_name="http_requests_inprogress",
         inprogress_labels=True
@@ -121,6 +175,13 @@ def setup_metrics(app):
 
     instrumentator.instrument(app).expose(app, endpoint="/metrics")
 
+    # Read the API engine's pool state at scrape time
+    from .database import engine
+
+    if isinstance(engine.pool, QueuePool):
+        db_connection_pool_size.set_function(engine.pool.size)
+        db_connection_pool_available.set_function(engine.pool.checkedin)
+
     return instrumentator
 
 
@@ -133,18 +194,19 @@ def track_recommendation_time(algorithm: str):
         def generate_recommendations():
             pass
     """
+    histogram = recommendation_generation_duration_seconds.labels(algorithm=algorithm)
+
     def decorator(func: Callable):
+        if not METRICS_ENABLED:
+            return func
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start = time.perf_counter_ns()
             try:
-                result = func(*args, **kwargs)
-                return result
+                return func(*args, **kwargs)
             finally:
-                duration = time.time() - start_time
-                recommendation_generation_duration_seconds.labels(
-                    algorithm=algorithm
-                ).observe(duration)
+                histogram.observe((time.perf_counter_ns() - start) * 1e-9)
 
         return wrapper
 
@@ -160,18 +222,19 @@ def track_db_query(query_type: str):
         def get_users():
             pass
     """
+    histogram = db_query_duration_seconds.labels(query_type=query_type)
+
     def decorator(func: Callable):
+        if not METRICS_ENABLED:
+            return func
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start = time.perf_counter_ns()
             try:
-                result = func(*args, **kwargs)
-                return result
+                return func(*args, **kwargs)
             finally:
-                duration = time.time() - start_time
-                db_query_duration_seconds.labels(
-                    query_type=query_type
-                ).observe(duration)
+                histogram.observe((time.perf_counter_ns() - start) * 1e-9)
 
         return wrapper
 
@@ -180,35 +243,91 @@ def track_db_query(query_type: str):
 
 def increment_cache_hit(cache_type: str = "redis"):
     """Increment cache hit counter"""
-    cache_hits_total.labels(cache_type=cache_type).inc()
+    if not METRICS_ENABLED:
+        return
+
+    if cache_type == "redis":
+        CACHE_HIT_REDIS.inc()
+    else:
+        _labelled(cache_hits_total, _cache_hit_children, cache_type).inc()
 
 
 def increment_cache_miss(cache_type: str = "redis"):
     """Increment cache miss counter"""
-    cache_misses_total.labels(cache_type=cache_type).inc()
+    if not METRICS_ENABLED:
+        return
+
+    if cache_type == "redis":
+        CACHE_MISS_REDIS.inc()
+    else:
+        _labelled(cache_misses_total, _cache_miss_children, cache_type).inc()
 
 
 def record_recommendation(algorithm: str, user_id: int, count: int = 1):
-    """Record recommendation generation"""
-    recommendations_generated_total.labels(
-        algorithm=algorithm,
-        user_id=str(user_id)
-    ).inc(count)
+    """
+    Record recommendation generation
+
+    The user ID goes to the structured log rather than a metric label,
+    since one time series per user grows without bound.
+    """
+    if not METRICS_ENABLED:
+        return
+
+    _labelled(recommendations_generated_total, _recommendation_children, algorithm).inc(count)
+    logger.debug("Recommendations generated", algorithm=algorithm, user_id=user_id, count=count)
 
 
 def record_interaction(interaction_type: str):
     """Record interaction creation"""
-    interactions_created_total.labels(
-        interaction_type=interaction_type
-    ).inc()
+    if not METRICS_ENABLED:
+        return
+
+    _labelled(interactions_created_total, _interaction_children, interaction_type).inc()
 
 
 def record_ab_assignment(test_name: str, variant: str):
     """Record A/B test assignment"""
-    ab_test_assignments_total.labels(
-        test_name=test_name,
-        variant=variant
-    ).inc()
+    if not METRICS_ENABLED:
+        return
+
+    _labelled(ab_test_assignments_total, _ab_assignment_children, test_name, variant).inc()
+
+
+def _table_count(db, model) -> int:
+    """
+    Count the rows of a model's table
+
+    On PostgreSQL the planner's reltuples estimate is used, which avoids a
+    sequential scan. Tables that were never analyzed report -1 there, in
+    which case an exact count is taken instead.
+
+    Args:
+        db: Database session
+        model: SQLAlchemy model class
+
+    Returns:
+        Row count (estimated on PostgreSQL)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(_ESTIMATED_COUNT_SQL, {"t": model.__tablename__}).scalar()
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+
+    return db.query(model).count()
+
+
+def _system_counts(db) -> Tuple[int, int, int]:
+    """Get user, item and interaction counts, cached for 30 seconds"""
+    counts = _sys_metric_cache.get("counts")
+    if counts is None:
+        from ..models import User, Item, Interaction
+
+        counts = _sys_metric_cache["counts"] = (
+            _table_count(db, User),
+            _table_count(db, Item),
+            _table_count(db, Interaction),
+        )
+    return counts
 
 
 def update_system_metrics(db):
@@ -218,16 +337,8 @@ def update_system_metrics(db):
     Args:
         db: Database session
     """
-    from ..models import User, Item, Interaction
+    user_count, item_count, interaction_count = _system_counts(db)
 
-    # Update user count
-    user_count = db.query(User).count()
     active_users_gauge.set(user_count)
-
-    # Update item count
-    item_count = db.query(Item).count()
     active_items_gauge.set(item_count)
-
-    # Update interaction count
-    interaction_count = db.query(Interaction).count()
     total_interactions_gauge.set(interaction_count)
@@ -0,0 +1,45 @@
+"""ASGI middleware"""
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from .auth import decode_token_cached, get_cached_token_payload
+
+
+class JWTDecodeMiddleware:
+    """
+    Decode the Bearer token once per request
+
+    Stores the decoded payload on ``request.state.jwt_payload`` so that
+    authentication and rate limiting dependencies don't each decode the
+    same token. Invalid or missing tokens leave the payload as None; the
+    dependencies then produce the usual 401 response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            payload = None
+
+            for name, value in scope["headers"]:
+                if name == b"authorization":
+                    if value.startswith(b"Bearer "):
+                        payload = await self._decode(value[7:].decode("latin-1"))
+                    break
+
+            scope.setdefault("state", {})["jwt_payload"] = payload
+
+        await self.app(scope, receive, send)
+
+    async def _decode(self, token: str):
+        """Decode a token, returning None if it is invalid"""
+        payload = get_cached_token_payload(token)
+        if payload is not None:
+            return payload
+
+        try:
+            return await run_in_threadpool(decode_token_cached, token)
+        except HTTPException:
+            return None
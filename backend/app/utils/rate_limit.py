@@ -4,14 +4,25 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import Callable
 import functools
+import redis
+
+# Use Redis for distributed rate limiting
+RATE_LIMIT_STORAGE_URI = "redis://redis:6379/1"
+
+# One connection pool shared by both limiters instead of one pool each.
+# The limits Redis storage already increments and sets the window expiry
+# in a single Lua call, so each check is one round-trip.
+_rate_limit_pool = redis.ConnectionPool.from_url(RATE_LIMIT_STORAGE_URI, max_connections=64)
 
 # Initialize limiter
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["100/minute"],
-    storage_uri="redis://redis:6379/1",  # Use Redis for distributed rate limiting
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    storage_options={"connection_pool": _rate_limit_pool},
     strategy="fixed-window"
 )
 
@@ -48,13 +59,22 @@ async def get_user_rate_limit_key(request: Request) -> str:
 
     Falls back to IP address if user is not authenticated.
     """
-    # Try to get user from token
+    # Prefer the payload decoded by JWTDecodeMiddleware
+    payload = getattr(request.state, "jwt_payload", None)
+    if payload is not None:
+        user_id = payload.get("sub")
+        if user_id:
+            return f"user:{user_id}"
+
+    # Otherwise try to get user from token
     auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
+    if payload is None and auth_header and auth_header.startswith("Bearer "):
         try:
-            from .auth import decode_token
+            from .auth import decode_token_cached, get_cached_token_payload
             token = auth_header.split(" ")[1]
-            payload = decode_token(token)
+            payload = get_cached_token_payload(token)
+            if payload is None:
+                payload = await run_in_threadpool(decode_token_cached, token)
             user_id = payload.get("sub")
             if user_id:
                 return f"user:{user_id}"
@@ -69,6 +89,7 @@ async def get_user_rate_limit_key(request: Request) -> str:
 user_limiter = Limiter(
     key_func=get_user_rate_limit_key,
     default_limits=["200/minute"],
-    storage_uri="redis://redis:6379/1",
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    storage_options={"connection_pool": _rate_limit_pool},
     strategy="fixed-window"
 )
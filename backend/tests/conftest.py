@@ -1,16 +1,122 @@
 """Pytest configuration and fixtures"""
 
+import os
+
+# Cheap bcrypt hashes and no metrics collection for tests; these must be set
+# before the app modules are imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("ENABLE_METRICS", "false")
+
+import hashlib
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.models.base import Base
 
+# Set to a PostgreSQL URL to run against Postgres instead of in-memory SQLite
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# Applied to each in-memory SQLite connection
+SQLITE_PRAGMAS = ("journal_mode=MEMORY", "synchronous=OFF", "temp_store=MEMORY")
+
+# Arbitrary advisory lock key serializing template creation across workers
+_TEMPLATE_LOCK_KEY = 7301
+
+
+def _schema_fingerprint() -> str:
+    """Short hash of the model schema, so template databases never go stale"""
+    schema = sorted(
+        (table.name, tuple(f"{column.name}:{column.type}" for column in table.columns))
+        for table in Base.metadata.sorted_tables
+    )
+    return hashlib.md5(repr(schema).encode()).hexdigest()[:8]
+
+
+def _create_worker_database(url):
+    """
+    Clone a per-worker PostgreSQL database from a schema template
+
+    The template is built once per schema version; each pytest(-xdist)
+    worker then gets its own copy via CREATE DATABASE ... TEMPLATE.
+
+    Args:
+        url: SQLAlchemy URL of the base test database
+
+    Returns:
+        URL of the worker database
+    """
+    template = f"{url.database}_template_{_schema_fingerprint()}"
+    worker = f"{url.database}_{os.getenv('PYTEST_XDIST_WORKER', 'main')}"
+
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _TEMPLATE_LOCK_KEY})
+        try:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": template}
+            ).scalar()
+            if not exists:
+                conn.execute(text(f'CREATE DATABASE "{template}"'))
+                template_engine = create_engine(url.set(database=template))
+                Base.metadata.create_all(template_engine)
+                template_engine.dispose()
+
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{worker}"'))
+            conn.execute(text(f'CREATE DATABASE "{worker}" TEMPLATE "{template}"'))
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _TEMPLATE_LOCK_KEY})
+    admin.dispose()
+
+    return url.set(database=worker)
+
+
+def _drop_worker_database(url):
+    """Drop a database created by _create_worker_database"""
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{url.database}"'))
+    admin.dispose()
+
 
 @pytest.fixture(scope="session")
 def engine():
-    """Create a test database engine"""
-    return create_engine("sqlite:///:memory:")
+    """Create a test database engine shared by the whole session"""
+
+    if TEST_DATABASE_URL:
+        worker_url = _create_worker_database(make_url(TEST_DATABASE_URL))
+        engine = create_engine(worker_url)
+
+        yield engine
+
+        engine.dispose()
+        _drop_worker_database(worker_url)
+        return
+
+    # StaticPool keeps one connection so TestClient threads see the same
+    # in-memory database
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with pysqlite, and
+    # skip journaling and fsync work a throwaway database doesn't need
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        for pragma in SQLITE_PRAGMAS:
+            dbapi_connection.execute(f"PRAGMA {pragma}")
+
+    @event.listens_for(engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    yield engine
 
 
 @pytest.fixture(scope="session")
@@ -23,11 +129,17 @@ def tables(engine):
 
 @pytest.fixture
 def db_session(engine, tables):
-    """Create a new database session for a test"""
+    """
+    Create a new database session for a test
+
+    The session runs inside an outer transaction that is rolled back on
+    teardown; its commits only release savepoints.
+    """
+    from app.services.collaborative_filtering import invalidate_collaborative_model
 
     connection = engine.connect()
     transaction = connection.begin()
-    Session = sessionmaker(bind=connection)
+    Session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
     session = Session()
 
     yield session
@@ -35,3 +147,83 @@ def db_session(engine, tables):
     session.close()
     transaction.rollback()
     connection.close()
+
+    # The shared CF model is keyed by engine, which every test shares
+    invalidate_collaborative_model()
+
+
+@pytest.fixture
+def test_db(engine, tables):
+    """
+    Point the API at the test database for a single test
+
+    Each test runs inside an outer transaction that is rolled back on
+    teardown; commits made by the endpoints only release savepoints.
+    """
+    from app.main import app
+    from app.utils.database import get_db
+    from app.utils.dependencies import _user_cache, _user_cache_lock
+    from app.services.collaborative_filtering import invalidate_collaborative_model
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    TestingSessionLocal = sessionmaker(
+        bind=connection, join_transaction_mode="create_savepoint"
+    )
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+
+    yield connection
+
+    app.dependency_overrides.clear()
+    transaction.rollback()
+    connection.close()
+
+    # User IDs are reused once the transaction is rolled back, and the
+    # rolled back data must not linger in the shared CF model
+    with _user_cache_lock:
+        _user_cache.clear()
+    invalidate_collaborative_model()
+
+
+@pytest.fixture(scope="session")
+def hashed_test_password():
+    """Hash the shared test password once per session"""
+    from app.utils.auth import get_password_hash
+
+    return get_password_hash("testpass123")
+
+
+@pytest.fixture
+def registered_user(test_db, hashed_test_password):
+    """
+    Insert a user directly into the test database
+
+    For tests that need an existing account but aren't exercising the
+    registration endpoint. The password is "testpass123".
+    """
+    from app.models import User
+
+    Session = sessionmaker(bind=test_db, join_transaction_mode="create_savepoint")
+    session = Session()
+
+    user = User(
+        username="testuser",
+        email="test@example.com",
+        preferences={"password_hash": hashed_test_password},
+        role="user"
+    )
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    session.expunge(user)
+    session.close()
+
+    return user
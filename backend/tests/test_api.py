@@ -2,35 +2,8 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.models.base import Base
-from app.utils.database import get_db
-
-
-@pytest.fixture
-def test_db():
-    """Create a test database"""
-
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-
-    TestingSessionLocal = sessionmaker(bind=engine)
-
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
-
-    yield
-
-    app.dependency_overrides.clear()
 
 
 @pytest.fixture
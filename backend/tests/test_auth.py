@@ -2,38 +2,11 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.models.base import Base
-from app.utils.database import get_db
 from app.utils.auth import create_access_token, verify_password, get_password_hash
 
 
-@pytest.fixture
-def test_db():
-    """Create a test database"""
-
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-
-    TestingSessionLocal = sessionmaker(bind=engine)
-
-    def override_get_db():
-        db = TestingSessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
-
-    app.dependency_overrides[get_db] = override_get_db
-
-    yield
-
-    app.dependency_overrides.clear()
-
-
 @pytest.fixture
 def client(test_db):
     """Create a test client"""
@@ -91,20 +64,9 @@ def test_register_duplicate_username(client):
     assert "Username already exists" in response.json()["detail"]
 
 
-def test_login(client):
+def test_login(client, registered_user):
     """Test user login"""
 
-    # Register user
-    client.post(
-        "/api/v1/auth/register",
-        json={
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "testpass123",
-            "preferences": {}
-        }
-    )
-
     # Login
     response = client.post(
         "/api/v1/auth/login",
@@ -121,20 +83,9 @@ def test_login(client):
     assert data["token_type"] == "bearer"
 
 
-def test_login_invalid_credentials(client):
+def test_login_invalid_credentials(client, registered_user):
     """Test login with invalid credentials"""
 
-    # Register user
-    client.post(
-        "/api/v1/auth/register",
-        json={
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "testpass123",
-            "preferences": {}
-        }
-    )
-
     # Try to login with wrong password
     response = client.post(
         "/api/v1/auth/login",
@@ -148,20 +99,9 @@ def test_login_invalid_credentials(client):
     assert "Incorrect email or password" in response.json()["detail"]
 
 
-def test_get_current_user(client):
+def test_get_current_user(client, registered_user):
     """Test getting current user with token"""
 
-    # Register user
-    client.post(
-        "/api/v1/auth/register",
-        json={
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "testpass123",
-            "preferences": {}
-        }
-    )
-
     # Login to get token
     login_response = client.post(
         "/api/v1/auth/login",
@@ -196,20 +136,24 @@ def test_get_current_user_invalid_token(client):
     assert response.status_code == 401
 
 
-def test_refresh_token(client):
-    """Test refreshing access token"""
+def test_get_current_user_missing_token(client):
+    """Test getting current user without a Bearer token"""
 
-    # Register and login
-    client.post(
-        "/api/v1/auth/register",
-        json={
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "testpass123",
-            "preferences": {}
-        }
+    response = client.get("/api/v1/auth/me")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+    response = client.get(
+        "/api/v1/auth/me",
+        headers={"Authorization": "Basic dXNlcjpwYXNz"}
     )
+    assert response.status_code == 401
+
+
+def test_refresh_token(client, registered_user):
+    """Test refreshing access token"""
 
+    # Login
     login_response = client.post(
         "/api/v1/auth/login",
         json={
@@ -261,3 +205,17 @@ def test_token_creation():
     assert payload["sub"] == user_id
     assert payload["type"] == "access"
     assert "exp" in payload
+
+
+def test_cached_token_decode():
+    """Test cached JWT decoding returns the same payload as a fresh decode"""
+
+    from app.utils.auth import decode_token, decode_token_cached
+
+    token = create_access_token(data={"sub": 123})
+
+    first = decode_token_cached(token)
+    second = decode_token_cached(token)
+
+    assert first == decode_token(token)
+    assert second is first
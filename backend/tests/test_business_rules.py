@@ -1,11 +1,8 @@
 """Tests for Business Rules Engine"""
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
-from app.models.base import Base
 from app.models import User, Item, Interaction
 from app.services.business_rules import (
     BusinessRulesEngine,
@@ -17,21 +14,6 @@ from app.services.business_rules import (
 )
 
 
-@pytest.fixture
-def db_session():
-    """Create a test database session"""
-
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-
-    TestingSessionLocal = sessionmaker(bind=engine)
-    session = TestingSessionLocal()
-
-    yield session
-
-    session.close()
-
-
 @pytest.fixture
 def sample_data(db_session):
     """Create sample data for testing"""
@@ -124,15 +106,17 @@ def test_diversity_rule(db_session, sample_data):
     diversified = rule.apply(recommendations, user, {}, db_session)
 
     # Should limit to 1 per category in top results
-    categories_seen = set()
-    top_3 = diversified[:3]
+    top_3 = [item_id for item_id, _ in diversified[:3]]
+    categories = dict(
+        db_session.query(Item.id, Item.category).filter(Item.id.in_(top_3)).all()
+    )
+    categories_seen = {categories[item_id] for item_id in top_3}
 
-    for item_id, _ in top_3:
-        item = db_session.query(Item).filter(Item.id == item_id).first()
-        category = item.category
-        # Each category should appear at most once in top 3
-        if len(categories_seen) < 3:
-            categories_seen.add(category)
+    # Each category should appear at most once in top 3
+    assert len(categories_seen) == 3
+
+    # Items over the category limit are kept, just moved to the end
+    assert len(diversified) == len(recommendations)
 
 
 def test_business_rules_engine(db_session, sample_data):
@@ -161,6 +145,22 @@ def test_business_rules_engine(db_session, sample_data):
     assert 3 in item_ids
 
 
+def test_rules_use_preloaded_context(db_session, sample_data):
+    """Test that rules read items and purchases from the shared context"""
+
+    user, items = sample_data
+    recommendations = [(1, 1.0), (3, 0.8)]
+
+    # Only item 3 is preloaded, so item 1 is treated as unknown and dropped
+    context = {"items": {3: items[2]}, "purchased": set()}
+    filtered = FilterOutOfStockRule().apply(recommendations, user, context, db_session)
+    assert [item_id for item_id, _ in filtered] == [3]
+
+    # The preloaded purchase set takes precedence over the database
+    filtered = FilterAlreadyPurchasedRule().apply(recommendations, user, context, db_session)
+    assert [item_id for item_id, _ in filtered] == [1, 3]
+
+
 def test_add_remove_rules(db_session, sample_data):
     """Test adding and removing rules"""
 
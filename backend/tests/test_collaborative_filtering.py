@@ -1,31 +1,12 @@
 """Tests for Collaborative Filtering Service"""
 
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 import numpy as np
 
-from app.models.base import Base
 from app.models import User, Item, Interaction
 from app.services.collaborative_filtering import CollaborativeFilteringService
 
 
-@pytest.fixture
-def db_session():
-    """Create a test database session"""
-
-    # Use in-memory SQLite for tests
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-
-    TestingSessionLocal = sessionmaker(bind=engine)
-    session = TestingSessionLocal()
-
-    yield session
-
-    session.close()
-
-
 @pytest.fixture
 def sample_data(db_session):
     """Create sample data for testing"""
@@ -123,3 +104,43 @@ def test_exclude_interacted_items(db_session, sample_data):
 
     assert 1 not in recommended_item_ids
     assert 2 not in recommended_item_ids
+
+
+def test_model_shared_between_instances(db_session, sample_data):
+    """Test that built matrices are reused until invalidated"""
+
+    service = CollaborativeFilteringService(db_session)
+    matrix = service.build_user_item_matrix()
+
+    # A new instance on the same database picks up the built matrix
+    other = CollaborativeFilteringService(db_session)
+    assert other.user_item_matrix is matrix
+
+    # Invalidating drops it for new instances
+    other.invalidate()
+    assert other.user_item_matrix is None
+    assert CollaborativeFilteringService(db_session).user_item_matrix is None
+
+
+def test_get_factor_recommendations(db_session, sample_data):
+    """Test latent factor recommendations"""
+
+    service = CollaborativeFilteringService(db_session)
+    recommendations = service.get_recommendations(user_id=1, top_n=2, method="factors")
+
+    assert isinstance(recommendations, list)
+    assert len(recommendations) <= 2
+
+    # User 1 has interacted with items 1 and 2
+    recommended_item_ids = [item_id for item_id, _ in recommendations]
+    assert 1 not in recommended_item_ids
+    assert 2 not in recommended_item_ids
+
+
+def test_default_method_uses_factor_model(db_session, sample_data):
+    """Test that the default method serves from the latent factor model"""
+
+    service = CollaborativeFilteringService(db_session)
+
+    assert service.get_recommendations(user_id=1, top_n=2) == \
+        service.get_factor_recommendations(user_id=1, top_n=2)
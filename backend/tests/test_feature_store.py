@@ -1,28 +1,11 @@
 """Tests for Feature Store"""
 
+import numpy as np
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 
-from app.models.base import Base
 from app.models import User, Item, Interaction
-from app.services.feature_store import FeatureStore
-
-
-@pytest.fixture
-def db_session():
-    """Create a test database session"""
-
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
-
-    TestingSessionLocal = sessionmaker(bind=engine)
-    session = TestingSessionLocal()
-
-    yield session
-
-    session.close()
+from app.services.feature_store import FeatureStore, _activity_score, _recency_score, _top_categories
 
 
 @pytest.fixture
@@ -66,6 +49,9 @@ def test_get_user_features(db_session, sample_data):
     assert "favorite_categories" in features
     assert "activity_score" in features
     assert "recency_score" in features
+    assert features["interaction_types"] == {"view": 1, "purchase": 1}
+    assert features["avg_rating"] == 4.5
+    assert sorted(features["favorite_categories"]) == ["books", "movies"]
 
 
 def test_get_item_features(db_session, sample_data):
@@ -102,9 +88,9 @@ def test_favorite_categories(db_session, sample_data):
     """Test computing favorite categories"""
 
     user, items, interactions = sample_data
-    feature_store = FeatureStore(db_session)
+    categories = np.array([item.category for item in items], dtype=object)
 
-    favorite_categories = feature_store._compute_favorite_categories(user.id, top_n=2)
+    favorite_categories = _top_categories(categories, top_n=2)
 
     assert isinstance(favorite_categories, list)
     # User interacted with books and movies
@@ -115,9 +101,9 @@ def test_activity_score(db_session, sample_data):
     """Test computing activity score"""
 
     user, items, interactions = sample_data
-    feature_store = FeatureStore(db_session)
+    created_at = np.array([i.created_at for i in interactions], dtype="datetime64[us]")
 
-    activity_score = feature_store._compute_activity_score(interactions)
+    activity_score = _activity_score(created_at)
 
     assert isinstance(activity_score, float)
     assert 0.0 <= activity_score <= 1.0
@@ -127,9 +113,9 @@ def test_recency_score(db_session, sample_data):
     """Test computing recency score"""
 
     user, items, interactions = sample_data
-    feature_store = FeatureStore(db_session)
+    created_at = np.array([i.created_at for i in interactions], dtype="datetime64[us]")
 
-    recency_score = feature_store._compute_recency_score(interactions)
+    recency_score = _recency_score(created_at)
 
     assert isinstance(recency_score, float)
     assert 0.0 <= recency_score <= 1.0
@@ -7,18 +7,45 @@ Provides a user-friendly web interface to interact with the recommendation engin
 from fastapi import FastAPI, Request, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse
+from contextlib import asynccontextmanager
 from pathlib import Path
+import asyncio
 import httpx
-from typing import Optional
+import orjson
+from cachetools import TTLCache
+from typing import Any, Optional
 
 # Configuration
 BACKEND_URL = "http://backend:8000/api/v1"
 
+# Short-lived cache of backend list responses, keyed by URL
+RESP_CACHE = TTLCache(maxsize=256, ttl=15)
+_MISSING = object()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan events"""
+
+    # One pooled client for all backend calls, so connections are reused
+    app.state.client = httpx.AsyncClient(
+        base_url=BACKEND_URL,
+        timeout=httpx.Timeout(10.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+
+    yield
+
+    await app.state.client.aclose()
+
+
 app = FastAPI(
     title="Recommendation Engine - Frontend",
     version="1.0.0",
-    description="Web interface for the Recommendation Engine"
+    description="Web interface for the Recommendation Engine",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Setup templates
@@ -30,6 +57,49 @@ static_path.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 
+def _json_or_default(response, default):
+    """
+    Decode a backend response gathered with return_exceptions=True
+
+    Args:
+        response: httpx response, or the exception raised by the request
+        default: Value to use on errors or non-200 responses
+
+    Returns:
+        Decoded JSON body or default
+    """
+    if isinstance(response, Exception) or response.status_code != 200:
+        return default
+
+    try:
+        return orjson.loads(response.content)
+    except ValueError:
+        return default
+
+
+async def cached_get(client: httpx.AsyncClient, url: str) -> Optional[Any]:
+    """
+    GET a backend URL, reusing successful responses for up to 15 seconds
+
+    Args:
+        client: Shared backend client
+        url: URL relative to the backend API, including any query string
+
+    Returns:
+        Decoded JSON body, or None for non-200 responses
+    """
+    data = RESP_CACHE.get(url, _MISSING)
+    if data is not _MISSING:
+        return data
+
+    response = await client.get(url)
+    if response.status_code != 200:
+        return None
+
+    data = RESP_CACHE[url] = orjson.loads(response.content)
+    return data
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Home page"""
@@ -40,13 +110,12 @@ async def home(request: Request):
 async def list_users(request: Request):
     """List all users"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BACKEND_URL}/users")
-            users = response.json() if response.status_code == 200 else []
-        except Exception as e:
-            users = []
-            error = str(e)
+    client = request.app.state.client
+    try:
+        users = await cached_get(client, "/users") or []
+    except Exception as e:
+        users = []
+        error = str(e)
 
     return templates.TemplateResponse(
         "users.html",
@@ -62,41 +131,42 @@ async def create_user_form(request: Request):
 
 @app.post("/users/create")
 async def create_user(
+    request: Request,
     username: str = Form(...),
     email: str = Form(...)
 ):
     """Create a new user"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BACKEND_URL}/users",
-                json={"username": username, "email": email, "preferences": {}}
-            )
+    client = request.app.state.client
+    try:
+        response = await client.post(
+            "/users",
+            json={"username": username, "email": email, "preferences": {}}
+        )
 
-            if response.status_code == 201:
-                return RedirectResponse(url="/users", status_code=303)
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+        if response.status_code == 201:
+            RESP_CACHE.clear()
+            return RedirectResponse(url="/users", status_code=303)
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
 
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/items", response_class=HTMLResponse)
 async def list_items(request: Request, category: Optional[str] = None):
     """List all items"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            url = f"{BACKEND_URL}/items"
-            if category:
-                url += f"?category={category}"
+    client = request.app.state.client
+    try:
+        url = "/items"
+        if category:
+            url += f"?category={category}"
 
-            response = await client.get(url)
-            items = response.json() if response.status_code == 200 else []
-        except Exception as e:
-            items = []
+        items = await cached_get(client, url) or []
+    except Exception as e:
+        items = []
 
     return templates.TemplateResponse(
         "items.html",
@@ -112,6 +182,7 @@ async def create_item_form(request: Request):
 
 @app.post("/items/create")
 async def create_item(
+    request: Request,
     title: str = Form(...),
     description: str = Form(""),
     category: str = Form(""),
@@ -121,26 +192,27 @@ async def create_item(
 
     tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BACKEND_URL}/items",
-                json={
-                    "title": title,
-                    "description": description,
-                    "category": category,
-                    "tags": tag_list,
-                    "features": {}
-                }
-            )
-
-            if response.status_code == 201:
-                return RedirectResponse(url="/items", status_code=303)
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
-
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    client = request.app.state.client
+    try:
+        response = await client.post(
+            "/items",
+            json={
+                "title": title,
+                "description": description,
+                "category": category,
+                "tags": tag_list,
+                "features": {}
+            }
+        )
+
+        if response.status_code == 201:
+            RESP_CACHE.clear()
+            return RedirectResponse(url="/items", status_code=303)
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/recommendations/{user_id}", response_class=HTMLResponse)
@@ -152,24 +224,20 @@ async def get_recommendations(
 ):
     """Get recommendations for a user"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            # Get user info
-            user_response = await client.get(f"{BACKEND_URL}/users/{user_id}")
-            user = user_response.json() if user_response.status_code == 200 else None
-
-            # Get recommendations
-            rec_response = await client.get(
-                f"{BACKEND_URL}/recommendations/user/{user_id}",
-                params={"algorithm": algorithm, "top_n": top_n}
-            )
+    client = request.app.state.client
 
-            recommendations = rec_response.json() if rec_response.status_code == 200 else None
+    # Fetch user info and recommendations concurrently
+    user_response, rec_response = await asyncio.gather(
+        client.get(f"/users/{user_id}"),
+        client.get(
+            f"/recommendations/user/{user_id}",
+            params={"algorithm": algorithm, "top_n": top_n}
+        ),
+        return_exceptions=True
+    )
 
-        except Exception as e:
-            user = None
-            recommendations = None
-            error = str(e)
+    user = _json_or_default(user_response, None)
+    recommendations = _json_or_default(rec_response, None)
 
     return templates.TemplateResponse(
         "recommendations.html",
@@ -186,17 +254,17 @@ async def get_recommendations(
 async def interact_form(request: Request):
     """Interaction form"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            users_response = await client.get(f"{BACKEND_URL}/users")
-            users = users_response.json() if users_response.status_code == 200 else []
+    client = request.app.state.client
 
-            items_response = await client.get(f"{BACKEND_URL}/items")
-            items = items_response.json() if items_response.status_code == 200 else []
+    # Fetch users and items concurrently
+    users_response, items_response = await asyncio.gather(
+        client.get("/users"),
+        client.get("/items"),
+        return_exceptions=True
+    )
 
-        except Exception:
-            users = []
-            items = []
+    users = _json_or_default(users_response, [])
+    items = _json_or_default(items_response, [])
 
     return templates.TemplateResponse(
         "interact.html",
@@ -206,6 +274,7 @@ async def interact_form(request: Request):
 
 @app.post("/interact")
 async def create_interaction(
+    request: Request,
     user_id: int = Form(...),
     item_id: int = Form(...),
     interaction_type: str = Form(...),
@@ -213,41 +282,40 @@ async def create_interaction(
 ):
     """Create a new interaction"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{BACKEND_URL}/interactions",
-                json={
-                    "user_id": user_id,
-                    "item_id": item_id,
-                    "interaction_type": interaction_type,
-                    "rating": rating,
-                    "weight": 1.0
-                }
+    client = request.app.state.client
+    try:
+        response = await client.post(
+            "/interactions",
+            json={
+                "user_id": user_id,
+                "item_id": item_id,
+                "interaction_type": interaction_type,
+                "rating": rating,
+                "weight": 1.0
+            }
+        )
+
+        if response.status_code == 201:
+            return RedirectResponse(
+                url=f"/recommendations/{user_id}",
+                status_code=303
             )
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
 
-            if response.status_code == 201:
-                return RedirectResponse(
-                    url=f"/recommendations/{user_id}",
-                    status_code=303
-                )
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
-
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/ab-tests", response_class=HTMLResponse)
 async def list_ab_tests(request: Request):
     """List all A/B tests"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BACKEND_URL}/ab-tests")
-            ab_tests = response.json() if response.status_code == 200 else []
-        except Exception:
-            ab_tests = []
+    client = request.app.state.client
+    try:
+        ab_tests = await cached_get(client, "/ab-tests") or []
+    except Exception:
+        ab_tests = []
 
     return templates.TemplateResponse(
         "ab_tests.html",
@@ -256,15 +324,16 @@ async def list_ab_tests(request: Request):
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{BACKEND_URL.replace('/api/v1', '')}/health")
-            backend_status = response.json() if response.status_code == 200 else {"status": "unhealthy"}
-        except Exception:
-            backend_status = {"status": "unreachable"}
+    client = request.app.state.client
+    try:
+        backend_status = await cached_get(
+            client, f"{BACKEND_URL.replace('/api/v1', '')}/health"
+        ) or {"status": "unhealthy"}
+    except Exception:
+        backend_status = {"status": "unreachable"}
 
     return {
         "status": "healthy",